@@ -4,20 +4,16 @@
 """
 from pathlib import Path
 from typing import Dict, List
-import json
 from datetime import datetime
 
-# 导入工具模块
-import sys
-
-# 添加项目根目录到路径
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
-
 from src.utils.logger import setup_logger
+from src.utils import json_utils
 
 logger = setup_logger('active_learning')
 
+# 合法的分类标签
+_VALID_LABELS = frozenset({'Task', 'Concept', 'Reference'})
+
 class ActiveLearningManager:
     """主动学习管理器 - Tier 3分类器"""
     
@@ -58,10 +54,14 @@ class ActiveLearningManager:
         Returns:
             审核请求结果
         """
+        # 仅保存前500字符，短内容原样保存
+        content = chunk["content"]
+        content_excerpt = content if len(content) <= 500 else content[:500] + "…"
+        
         review_item = {
             "chunk_id": chunk["id"],
             "title": chunk["title"],
-            "content": chunk["content"][:500] + "...",  # 仅保存前500字符
+            "content": content_excerpt,
             "timestamp": datetime.now().isoformat(),
             "tier1": {
                 "type": tier1_result["type"],
@@ -82,8 +82,7 @@ class ActiveLearningManager:
         pending.append(review_item)
         
         # 保存
-        with open(self.pending_review_path, 'w', encoding='utf-8') as f:
-            json.dump(pending, f, indent=2, ensure_ascii=False)
+        json_utils.dump(pending, self.pending_review_path)
         
         logger.warning(
             f"⚠️ 块 '{chunk['title'][:30]}...' 需要人工审核 "
@@ -107,7 +106,7 @@ class ActiveLearningManager:
             chunk_id: 块ID
             human_label: 人工标注结果 (Task/Concept/Reference)
         """
-        if human_label not in ["Task", "Concept", "Reference"]:
+        if human_label not in _VALID_LABELS:
             raise ValueError(f"无效的标注: {human_label}")
         
         # 从待审核队列中找到该项
@@ -132,14 +131,12 @@ class ActiveLearningManager:
             return
         
         # 保存更新后的队列
-        with open(self.pending_review_path, 'w', encoding='utf-8') as f:
-            json.dump(pending, f, indent=2, ensure_ascii=False)
+        json_utils.dump(pending, self.pending_review_path)
     
     def _load_pending_queue(self) -> List[Dict]:
         """加载待审核队列"""
         if self.pending_review_path.exists():
-            with open(self.pending_review_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return json_utils.load(self.pending_review_path)
         return []
     
     def _add_to_training_set(self, reviewed_item: Dict):
@@ -156,8 +153,8 @@ class ActiveLearningManager:
         }
         
         # 追加到训练集文件（JSONL格式，每行一个JSON）
-        with open(self.training_set_path, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(training_example, ensure_ascii=False) + '\n')
+        with open(self.training_set_path, 'ab') as f:
+            f.write(json_utils.dumps_bytes(training_example) + b'\n')
         
         logger.info(f"📖 训练集已更新: {self.training_set_path}")
     
@@ -183,13 +180,12 @@ class ActiveLearningManager:
             return
         
         training_data = []
-        with open(self.training_set_path, 'r', encoding='utf-8') as f:
+        with open(self.training_set_path, 'rb') as f:
             for line in f:
                 if line.strip():
-                    training_data.append(json.loads(line))
+                    training_data.append(json_utils.loads(line))
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(training_data, f, indent=2, ensure_ascii=False)
+        json_utils.dump(training_data, output_path)
         
         logger.info(f"📊 训练数据已导出: {output_path} ({len(training_data)} 条)")
     
@@ -197,9 +193,16 @@ class ActiveLearningManager:
         """获取统计信息"""
         pending = self._load_pending_queue()
         
+        # 单次遍历统计各状态数量
         total = len(pending)
-        pending_count = sum(1 for item in pending if item["status"] == "pending")
-        reviewed_count = sum(1 for item in pending if item["status"] == "reviewed")
+        pending_count = 0
+        reviewed_count = 0
+        for item in pending:
+            status = item["status"]
+            if status == "pending":
+                pending_count += 1
+            elif status == "reviewed":
+                reviewed_count += 1
         
         # 统计训练集大小
         training_count = 0
@@ -4,14 +4,6 @@
 """
 from typing import Dict, List
 
-# 导入工具模块
-import sys
-from pathlib import Path
-
-# 添加项目根目录到路径
-project_root = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(project_root))
-
 from src.utils.logger import setup_logger
 
 logger = setup_logger('fusion_engine')
@@ -19,6 +11,25 @@ logger = setup_logger('fusion_engine')
 class FusionEngine:
     """多分类器结果融合引擎"""
     
+    # 融合推理说明模板（按 _generate_reasoning 中的情况编号索引）
+    REASONING_TEMPLATES = (
+        # 情况1: 两层分类器完全一致
+        "Strong agreement: Both classifiers predict {final_type} "
+        "(Rules: {tier1_conf:.2f}, LLM: {tier2_conf:.2f})",
+        # 情况2: 规则分类器主导
+        "Rule-based classifier dominates: {final_type} with high confidence "
+        "({tier1_conf:.2f}), LLM suggested {tier2_type} ({tier2_conf:.2f})",
+        # 情况3: LLM分类器主导
+        "LLM classifier dominates: {final_type} with high confidence "
+        "({tier2_conf:.2f}), Rules suggested {tier1_type} ({tier1_conf:.2f})",
+        # 情况4: 融合解决冲突
+        "Fusion resolved conflict: Rules={tier1_type}({tier1_conf:.2f}), "
+        "LLM={tier2_type}({tier2_conf:.2f}), Final={final_type}({final_conf:.2f})",
+        # 情况5: 其他情况
+        "Weighted fusion result: {final_type} "
+        "(confidence: {final_conf:.2f})",
+    )
+    
     def __init__(
         self,
         tier1_weight: float = 0.3,
@@ -44,6 +55,9 @@ class FusionEngine:
         if abs(total_weight - 1.0) > 0.01:
             raise ValueError(f"权重和必须为1，当前为 {total_weight}")
         
+        # 权重严格和为1时，两个已归一化的分数分布线性组合后仍然归一化
+        self._weights_sum_one = abs(tier1_weight + tier2_weight - 1.0) < 1e-9
+        
         logger.info(
             f"🔀 融合引擎初始化: "
             f"Tier1={tier1_weight:.1f}, "
@@ -91,8 +105,9 @@ class FusionEngine:
             fused_scores[ctype] = fused_score
         
         # 归一化（确保总和为1）
+        # 权重和为1且输入分数已归一化时，融合结果本身已归一化，跳过除法
         total = sum(fused_scores.values())
-        if total > 0:
+        if total > 0 and not (self._weights_sum_one and abs(total - 1.0) < 1e-9):
             fused_scores = {k: v / total for k, v in fused_scores.items()}
         
         # 选择最高分
@@ -148,35 +163,25 @@ class FusionEngine:
         
         # 情况1: 两层分类器完全一致
         if tier1_type == tier2_type == final_type:
-            return (
-                f"Strong agreement: Both classifiers predict {final_type} "
-                f"(Rules: {tier1_conf:.2f}, LLM: {tier2_conf:.2f})"
-            )
-        
+            case = 0
         # 情况2: 规则分类器主导
         elif tier1_type == final_type and tier1_conf > 0.8:
-            return (
-                f"Rule-based classifier dominates: {final_type} with high confidence "
-                f"({tier1_conf:.2f}), LLM suggested {tier2_type} ({tier2_conf:.2f})"
-            )
-        
+            case = 1
         # 情况3: LLM分类器主导
         elif tier2_type == final_type and tier2_conf > 0.8:
-            return (
-                f"LLM classifier dominates: {final_type} with high confidence "
-                f"({tier2_conf:.2f}), Rules suggested {tier1_type} ({tier1_conf:.2f})"
-            )
-        
+            case = 2
         # 情况4: 融合解决冲突
         elif tier1_type != tier2_type:
-            return (
-                f"Fusion resolved conflict: Rules={tier1_type}({tier1_conf:.2f}), "
-                f"LLM={tier2_type}({tier2_conf:.2f}), Final={final_type}({final_confidence:.2f})"
-            )
-        
+            case = 3
         # 情况5: 其他情况
         else:
-            return (
-                f"Weighted fusion result: {final_type} "
-                f"(confidence: {final_confidence:.2f})"
-            )
\ No newline at end of file
+            case = 4
+        
+        return self.REASONING_TEMPLATES[case].format(
+            final_type=final_type,
+            final_conf=final_confidence,
+            tier1_type=tier1_type,
+            tier1_conf=tier1_conf,
+            tier2_type=tier2_type,
+            tier2_conf=tier2_conf
+        )
\ No newline at end of file
@@ -2,20 +2,12 @@
 混合分类器
 整合 Tier 1（规则）、Tier 2（LLM）、Tier 3（主动学习）
 """
-from typing import Dict
+from typing import Dict, List, Tuple
 
 from .rule_based_classifier import RuleBasedClassifier
 from .llm_classifier import LLMClassifier
 from .fusion_engine import FusionEngine
 
-# 导入工具模块
-import sys
-from pathlib import Path
-
-# 添加项目根目录到路径
-project_root = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(project_root))
-
 from src.utils.logger import setup_logger
 
 logger = setup_logger('hybrid_classifier')
@@ -59,6 +51,9 @@ class HybridClassifier:
         self.use_ai = use_ai
         self.tier1_high_confidence = tier1_high_confidence
         
+        # 融合结果缓存：相同的规则签名直接复用，避免重复调用LLM
+        self._fusion_cache: Dict[Tuple, Dict] = {}
+        
         logger.info("✅ 混合分类器初始化完成")
     
     def classify(self, chunk: Dict, features: Dict) -> Dict:
@@ -69,6 +64,7 @@ class HybridClassifier:
         1. Tier 1: 规则分类
            - 如果置信度 >= 0.9，直接返回
         2. Tier 2: LLM分类
+           - 相同规则签名命中缓存时复用已融合结果
            - 调用Few-shot LLM
         3. 融合结果
            - 置信度加权平均
@@ -93,12 +89,95 @@ class HybridClassifier:
             )
             return tier1_result
         
+        # 相同规则签名已融合过，直接复用（跳过LLM调用）
+        sig = self._rule_signature(tier1_result, features)
+        cached = self._fusion_cache.get(sig)
+        if cached is not None:
+            logger.info(f"  ♻️ 命中融合缓存，跳过LLM: {cached['type']}")
+            return dict(cached)
+        
         # ==================== Tier 2: LLM分类 ====================
         tier2_result = self.llm_classifier.classify(chunk, features)
         
         # ==================== 融合结果 ====================
+        return self._fuse(sig, tier1_result, tier2_result)
+    
+    def classify_batch(
+        self,
+        chunks: List[Dict],
+        features: List[Dict],
+        batch_size: int = 8
+    ) -> List[Dict]:
+        """
+        批量三层分类
+        
+        先对所有块运行Tier 1，高置信度和命中融合缓存的块直接返回，
+        其余块一次性交给LLM批量分类后再逐个融合。
+        
+        Args:
+            chunks: 文本块列表
+            features: 与chunks一一对应的特征列表
+            batch_size: LLM最大并发请求数
+            
+        Returns:
+            与chunks顺序一致的最终分类结果列表
+        """
+        results: List[Dict] = [None] * len(chunks)
+        pending = []
+        
+        # ==================== Tier 1: 规则分类 ====================
+        for i, (chunk, feats) in enumerate(zip(chunks, features)):
+            tier1_result = self.rule_classifier.classify(chunk, feats)
+            
+            if tier1_result['confidence'] >= self.tier1_high_confidence:
+                logger.info(
+                    f"  ✅ Tier 1高置信度 ({tier1_result['confidence']:.2f})，"
+                    f"跳过LLM: {tier1_result['type']}"
+                )
+                results[i] = tier1_result
+                continue
+            
+            sig = self._rule_signature(tier1_result, feats)
+            cached = self._fusion_cache.get(sig)
+            if cached is not None:
+                logger.info(f"  ♻️ 命中融合缓存，跳过LLM: {cached['type']}")
+                results[i] = dict(cached)
+                continue
+            
+            pending.append((i, sig, tier1_result))
+        
+        # ==================== Tier 2: LLM批量分类 + 融合 ====================
+        if pending:
+            tier2_results = self.llm_classifier.classify_batch(
+                [chunks[i] for i, _, _ in pending],
+                [features[i] for i, _, _ in pending],
+                batch_size=batch_size
+            )
+            for (i, sig, tier1_result), tier2_result in zip(pending, tier2_results):
+                results[i] = self._fuse(sig, tier1_result, tier2_result)
+        
+        return results
+    
+    @staticmethod
+    def _rule_signature(tier1_result: Dict, features: Dict) -> Tuple:
+        """融合缓存键：Tier 1匹配规则 + 关键结构特征"""
+        return (
+            tuple(sorted(tier1_result.get('matched_rules', []))),
+            round(tier1_result['confidence'], 2),
+            features.get('has_numbered_list'),
+            features.get('has_definition'),
+            features.get('has_table')
+        )
+    
+    def _fuse(self, sig: Tuple, tier1_result: Dict, tier2_result: Dict) -> Dict:
+        """融合Tier 1/Tier 2结果并写入融合缓存"""
         fused_result = self.fusion_engine.fuse(tier1_result, tier2_result)
         
+        # LLM调用失败时的兜底结果不缓存，下次仍重试；
+        # 缓存副本，避免调用方修改返回结果后污染缓存
+        if not tier2_result.get('fallback'):
+            self._fusion_cache[sig] = dict(fused_result)
+        
         # ==================== Tier 3: 检查是否需要人工审核 ====================
         # 注意：mark_for_review 在 DocumentAnalyzer 中调用
         # 这里只返回融合结果，由上层决定是否触发Tier 3
@@ -2,21 +2,17 @@
 LLM分类器 - Tier 2
 使用Few-shot学习进行分类，处理边界案例
 """
-from typing import Dict
-
-# 导入工具模块
-import sys
-from pathlib import Path
-
-# 添加项目根目录到路径
-project_root = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(project_root))
+from typing import Dict, List
 
 from src.utils.logger import setup_logger
 from src.utils.ai_service import AIService
+from src.utils import json_utils
 
 logger = setup_logger('llm_classifier')
 
+# 合法的分类标签
+_VALID_LABELS = frozenset({'Task', 'Concept', 'Reference'})
+
 class LLMClassifier:
     """基于LLM的Few-shot分类器 - Tier 2"""
     
@@ -128,6 +124,19 @@ Key characteristics:
 
 """
 
+    # prompt中展示的特征（特征键, 显示名称）
+    FEATURE_LABELS = (
+        ('imperative_verbs', 'Imperative verbs'),
+        ('action_verbs', 'Action verbs'),
+        ('has_numbered_list', 'Has numbered list'),
+        ('has_bullet_list', 'Has bullet list'),
+        ('has_table', 'Has table'),
+        ('has_definition', 'Has definition pattern'),
+        ('is_statements', '"Is" statements'),
+        ('word_count', 'Word count'),
+        ('code_blocks', 'Code blocks'),
+    )
+
     def __init__(self, use_ai: bool = True):
         """初始化LLM分类器"""
         self.use_ai = use_ai
@@ -190,25 +199,80 @@ Key characteristics:
                 "type": "Concept",
                 "confidence": 0.3,
                 "scores": {"Task": 0.33, "Concept": 0.34, "Reference": 0.33},
-                "reasoning": f"Error: {str(e)}"
+                "reasoning": f"Error: {str(e)}",
+                "fallback": True  # LLM调用失败的兜底结果
             }
 
+    def classify_batch(
+        self,
+        chunks: List[Dict],
+        features: List[Dict],
+        batch_size: int = 8
+    ) -> List[Dict]:
+        """
+        批量Few-shot LLM分类
+        
+        所有prompt一次性构建，按batch_size并发发送，每个响应独立解析；
+        单个块失败时只影响该块（返回低置信度默认结果）。
+        
+        Args:
+            chunks: 文本块列表
+            features: 与chunks一一对应的特征列表
+            batch_size: 最大并发请求数
+            
+        Returns:
+            与chunks顺序一致的分类结果列表
+        """
+        if not self.use_ai:
+            return [self.classify(chunk, feats) for chunk, feats in zip(chunks, features)]
+        
+        prompts = [
+            self._build_few_shot_prompt(chunk, feats)
+            for chunk, feats in zip(chunks, features)
+        ]
+        
+        responses = self.ai_service.generate_batch(
+            prompts=prompts,
+            temperature=0.3,
+            max_tokens=500,
+            json_mode=True,
+            max_workers=batch_size,
+            return_exceptions=True
+        )
+        
+        results = []
+        for response in responses:
+            try:
+                if isinstance(response, Exception):
+                    raise response
+                result = self._parse_response(response)
+                logger.info(
+                    f"  🤖 LLM分类: {result['type']} "
+                    f"(置信度: {result['confidence']:.2f})"
+                )
+            except Exception as e:
+                logger.error(f"❌ LLM分类失败: {e}")
+                result = {
+                    "type": "Concept",
+                    "confidence": 0.3,
+                    "scores": {"Task": 0.33, "Concept": 0.34, "Reference": 0.33},
+                    "reasoning": f"Error: {str(e)}",
+                    "fallback": True  # LLM调用失败的兜底结果
+                }
+            results.append(result)
+        
+        return results
+    
     def _build_few_shot_prompt(self, chunk: Dict, features: Dict) -> str:
         """构建Few-shot提示词"""
         
-        # 提取关键特征作为上下文
-        feature_summary = f"""
-Key Features Detected:
-- Imperative verbs: {features.get('imperative_verbs', 0)}
-- Action verbs: {features.get('action_verbs', 0)}
-- Has numbered list: {features.get('has_numbered_list', False)}
-- Has bullet list: {features.get('has_bullet_list', False)}
-- Has table: {features.get('has_table', False)}
-- Has definition pattern: {features.get('has_definition', False)}
-- "Is" statements: {features.get('is_statements', 0)}
-- Word count: {features.get('word_count', 0)}
-- Code blocks: {features.get('code_blocks', 0)}
-"""
+        # 提取关键特征作为上下文（省略为0/False的特征以缩短prompt）
+        parts = [
+            f"- {label}: {features[key]}"
+            for key, label in self.FEATURE_LABELS
+            if features.get(key)
+        ]
+        feature_summary = "Key Features Detected:\n" + ("\n".join(parts) if parts else "- None")
 
         prompt = f"""You are a DITA content classifier. Classify the following content as Task, Concept, or Reference.
 
@@ -246,7 +310,6 @@ Respond with ONLY the JSON object, no other text.
 
     def _parse_response(self, response: str) -> Dict:
         """解析LLM响应"""
-        import json
         import re
         
         # 提取JSON
@@ -254,7 +317,7 @@ Respond with ONLY the JSON object, no other text.
         if not json_match:
             raise ValueError("No JSON found in response")
         
-        result = json.loads(json_match.group())
+        result = json_utils.loads(json_match.group())
         
         # 验证必需字段
         required_fields = ['type', 'confidence', 'scores', 'reasoning']
@@ -266,7 +329,7 @@ Respond with ONLY the JSON object, no other text.
         result['type'] = result['type'].capitalize()
         
         # 验证类型
-        if result['type'] not in ['Task', 'Concept', 'Reference']:
+        if result['type'] not in _VALID_LABELS:
             logger.warning(f"⚠️ 无效类型 {result['type']}，默认为Concept")
             result['type'] = 'Concept'
         
@@ -2,7 +2,7 @@
 规则分类器 - Tier 1
 使用硬编码规则进行快速分类，处理80%的明显案例
 """
-from typing import Dict
+from typing import Dict, Set, Tuple
 
 # 导入工具模块
 import sys
@@ -16,6 +16,125 @@ from src.utils.logger import setup_logger
 
 logger = setup_logger('rule_classifier')
 
+# 分类类型（索引即规则表中的目标类型）
+_TYPE_NAMES = ("Task", "Concept", "Reference")
+_TASK, _CONCEPT, _REFERENCE = range(3)
+
+# 标题关键词
+_TASK_KEYWORDS = ('install', 'configure', 'setup', 'create', 'how to', 'guide',
+                  'step', 'tutorial', 'walkthrough', 'procedure')
+_REF_KEYWORDS = ('api', 'parameter', 'specification', 'reference', 'command',
+                 'syntax', 'function', 'method', 'class', 'attribute', 'property')
+_CONCEPT_KEYWORDS = ('what is', 'overview', 'introduction', 'understanding',
+                     'concept', 'about', 'explanation', 'theory', 'background')
+
+# 类型 → 标题关键词
+_TITLE_KEYWORDS = ((_TASK, _TASK_KEYWORDS),
+                   (_REFERENCE, _REF_KEYWORDS),
+                   (_CONCEPT, _CONCEPT_KEYWORDS))
+
+def _title_keyword_types(title: str) -> Set[int]:
+    """
+    标题关键词命中的类型集合
+    
+    标题很短，逐个子串查找（每种类型首次命中即停止）比合并的前瞻正则扫描更快
+    """
+    title_lower = title.lower()
+    types = set()
+    for type_idx, keywords in _TITLE_KEYWORDS:
+        for kw in keywords:
+            if kw in title_lower:
+                types.add(type_idx)
+                break
+    return types
+
+# 规则表: (规则名, 目标类型, 权重, 前置条件, 判定函数(features, 标题命中的类型集合) -> bool)
+# 前置条件：特征键（该特征为假时规则必然不命中，直接跳过）、标题关键词类型，
+# 或 None（无前置条件，总是评估）
+_RULES = (
+    # ==================== Task规则 ====================
+    # 强规则1: 编号列表 + 高密度祈使动词
+    ("strong_task_numbered_imperatives", _TASK, 0.5, 'has_numbered_list',
+     lambda f, t: bool(f.get('has_numbered_list')) and f.get('imperative_verbs', 0) >= 5),
+    # 强规则2: 编号列表 + 动作动词
+    ("numbered_list_with_actions", _TASK, 0.4, 'has_numbered_list',
+     lambda f, t: bool(f.get('has_numbered_list')) and f.get('action_verbs', 0) >= 5),
+    # 中等规则3: 项目符号列表 + 动作动词
+    ("bullet_list_with_actions", _TASK, 0.3, 'has_bullet_list',
+     lambda f, t: bool(f.get('has_bullet_list')) and f.get('action_verbs', 0) >= 4),
+    # 中等规则4: 高密度祈使动词（无列表）
+    ("high_imperative_verbs", _TASK, 0.25, 'imperative_verbs',
+     lambda f, t: f.get('imperative_verbs', 0) >= 3),
+    # 弱规则5: 标题包含Task关键词
+    ("task_title_keyword", _TASK, 0.2, _TASK,
+     lambda f, t: _TASK in t),
+    # 弱规则6: 动作动词密度高
+    ("high_action_verb_density", _TASK, 0.15, 'action_verbs',
+     lambda f, t: f.get('action_verbs', 0) >= 7),
+
+    # ==================== Reference规则 ====================
+    # 强规则7: 多个表格
+    ("strong_reference_multiple_tables", _REFERENCE, 0.5, 'table_count',
+     lambda f, t: f.get('table_count', 0) >= 2),
+    # 强规则8: 单个表格 + 少文本
+    ("table_low_text", _REFERENCE, 0.4, 'has_table',
+     lambda f, t: bool(f.get('has_table')) and f.get('word_count', 0) < 200),
+    # 中等规则9: 标题包含Reference关键词
+    ("reference_title_keyword", _REFERENCE, 0.35, _REFERENCE,
+     lambda f, t: _REFERENCE in t),
+    # 中等规则10: 大量代码块 + 少文本
+    ("code_heavy_low_text", _REFERENCE, 0.3, 'code_blocks',
+     lambda f, t: f.get('code_blocks', 0) >= 3 and f.get('word_count', 0) < 300),
+    # 弱规则11: 有表格
+    ("has_table", _REFERENCE, 0.2, 'has_table',
+     lambda f, t: bool(f.get('has_table'))),
+    # 弱规则12: 高密度命名实体
+    ("high_named_entities", _REFERENCE, 0.15, 'named_entities',
+     lambda f, t: f.get('named_entities', 0) >= 5),
+
+    # ==================== Concept规则 ====================
+    # 强规则13: 定义模式 + 高"is"陈述
+    ("strong_concept_definition_statements", _CONCEPT, 0.5, 'has_definition',
+     lambda f, t: bool(f.get('has_definition')) and f.get('is_statements', 0) >= 4),
+    # 中等规则14: 有定义模式
+    ("has_definition_pattern", _CONCEPT, 0.35, 'has_definition',
+     lambda f, t: bool(f.get('has_definition'))),
+    # 中等规则15: 高密度"is"陈述句
+    ("high_is_statements", _CONCEPT, 0.3, 'is_statements',
+     lambda f, t: f.get('is_statements', 0) >= 3),
+    # 中等规则16: 标题包含Concept关键词
+    ("concept_title_keyword", _CONCEPT, 0.3, _CONCEPT,
+     lambda f, t: _CONCEPT in t),
+    # 弱规则17: 描述性语言（少动作动词，多名词）
+    ("descriptive_language", _CONCEPT, 0.25, None,
+     lambda f, t: f.get('action_verbs', 0) < 2 and f.get('noun_count', 0) > f.get('verb_count', 1)),
+    # 弱规则18: 高命名实体（3-5个，适中）
+    ("moderate_named_entities", _CONCEPT, 0.15, 'named_entities',
+     lambda f, t: 3 <= f.get('named_entities', 0) <= 5),
+    # 弱规则19: 无列表，无表格（纯文本）
+    ("pure_text_no_structure", _CONCEPT, 0.1, None,
+     lambda f, t: (not f.get('has_numbered_list') and
+                   not f.get('has_bullet_list') and
+                   not f.get('has_table'))),
+)
+
+_RULE_NAMES = tuple(rule[0] for rule in _RULES)
+_RULE_TYPES = tuple(rule[1] for rule in _RULES)
+# 权重以0.01为单位存为整数，求和无浮点误差，平分时按 _TYPE_NAMES 顺序取第一个
+_RULE_WEIGHTS = tuple(round(rule[2] * 100) for rule in _RULES)
+_RULE_PREDICATES = tuple(rule[4] for rule in _RULES)
+
+# 前置条件索引：特征/标题类型 → 依赖它的规则
+_FEATURE_GATED_RULES: Dict[str, Tuple[int, ...]] = {}
+_TITLE_GATED_RULES: Dict[int, Tuple[int, ...]] = {}
+for _i, _rule in enumerate(_RULES):
+    _gate = _rule[3]
+    if isinstance(_gate, str):
+        _FEATURE_GATED_RULES[_gate] = _FEATURE_GATED_RULES.get(_gate, ()) + (_i,)
+    elif _gate is not None:
+        _TITLE_GATED_RULES[_gate] = _TITLE_GATED_RULES.get(_gate, ()) + (_i,)
+_UNGATED_RULES = tuple(_i for _i, _rule in enumerate(_RULES) if _rule[3] is None)
+
 class RuleBasedClassifier:
     """基于规则的分类器 - Tier 1"""
     
@@ -28,6 +147,9 @@ class RuleBasedClassifier:
         2. 组合特征规则（置信度 0.7-0.9）
         3. 弱特征规则（置信度 0.5-0.7）
         
+        规则定义在模块级规则表 _RULES 中，仅评估前置条件满足的规则，
+        对命中规则的整数权重按目标类型求和后归一化。
+        
         Args:
             chunk: 文本块
             features: 提取的特征
@@ -41,133 +163,45 @@ class RuleBasedClassifier:
                 "matched_rules": ["rule_name1", "rule_name2"]
             }
         """
-        scores = {"Task": 0.0, "Concept": 0.0, "Reference": 0.0}
-        matched_rules = []
-        
-        # ==================== Task规则 ====================
-        
-        # 强规则1: 编号列表 + 高密度祈使动词
-        if features.get('has_numbered_list') and features.get('imperative_verbs', 0) >= 5:
-            scores["Task"] += 0.5
-            matched_rules.append("strong_task_numbered_imperatives")
-        
-        # 强规则2: 编号列表 + 动作动词
-        if features.get('has_numbered_list') and features.get('action_verbs', 0) >= 5:
-            scores["Task"] += 0.4
-            matched_rules.append("numbered_list_with_actions")
-        
-        # 中等规则3: 项目符号列表 + 动作动词
-        if features.get('has_bullet_list') and features.get('action_verbs', 0) >= 4:
-            scores["Task"] += 0.3
-            matched_rules.append("bullet_list_with_actions")
-        
-        # 中等规则4: 高密度祈使动词（无列表）
-        if features.get('imperative_verbs', 0) >= 3:
-            scores["Task"] += 0.25
-            matched_rules.append("high_imperative_verbs")
-        
-        # 弱规则5: 标题包含Task关键词
-        task_keywords = ['install', 'configure', 'setup', 'create', 'how to', 'guide', 
-                         'step', 'tutorial', 'walkthrough', 'procedure']
-        title_lower = chunk['title'].lower()
-        if any(kw in title_lower for kw in task_keywords):
-            scores["Task"] += 0.2
-            matched_rules.append("task_title_keyword")
-        
-        # 弱规则6: 动作动词密度高
-        if features.get('action_verbs', 0) >= 7:
-            scores["Task"] += 0.15
-            matched_rules.append("high_action_verb_density")
-        
-        # ==================== Reference规则 ====================
-        
-        # 强规则7: 多个表格
-        if features.get('table_count', 0) >= 2:
-            scores["Reference"] += 0.5
-            matched_rules.append("strong_reference_multiple_tables")
-        
-        # 强规则8: 单个表格 + 少文本
-        if features.get('has_table') and features.get('word_count', 0) < 200:
-            scores["Reference"] += 0.4
-            matched_rules.append("table_low_text")
-        
-        # 中等规则9: 标题包含Reference关键词
-        ref_keywords = ['api', 'parameter', 'specification', 'reference', 'command', 
-                        'syntax', 'function', 'method', 'class', 'attribute', 'property']
-        if any(kw in title_lower for kw in ref_keywords):
-            scores["Reference"] += 0.35
-            matched_rules.append("reference_title_keyword")
-        
-        # 中等规则10: 大量代码块 + 少文本
-        if features.get('code_blocks', 0) >= 3 and features.get('word_count', 0) < 300:
-            scores["Reference"] += 0.3
-            matched_rules.append("code_heavy_low_text")
-        
-        # 弱规则11: 有表格
-        if features.get('has_table'):
-            scores["Reference"] += 0.2
-            matched_rules.append("has_table")
-        
-        # 弱规则12: 高密度命名实体
-        if features.get('named_entities', 0) >= 5:
-            scores["Reference"] += 0.15
-            matched_rules.append("high_named_entities")
-        
-        # ==================== Concept规则 ====================
-        
-        # 强规则13: 定义模式 + 高"is"陈述
-        if features.get('has_definition') and features.get('is_statements', 0) >= 4:
-            scores["Concept"] += 0.5
-            matched_rules.append("strong_concept_definition_statements")
-        
-        # 中等规则14: 有定义模式
-        if features.get('has_definition'):
-            scores["Concept"] += 0.35
-            matched_rules.append("has_definition_pattern")
-        
-        # 中等规则15: 高密度"is"陈述句
-        if features.get('is_statements', 0) >= 3:
-            scores["Concept"] += 0.3
-            matched_rules.append("high_is_statements")
-        
-        # 中等规则16: 标题包含Concept关键词
-        concept_keywords = ['what is', 'overview', 'introduction', 'understanding', 
-                            'concept', 'about', 'explanation', 'theory', 'background']
-        if any(kw in title_lower for kw in concept_keywords):
-            scores["Concept"] += 0.3
-            matched_rules.append("concept_title_keyword")
-        
-        # 弱规则17: 描述性语言（少动作动词，多名词）
-        if (features.get('action_verbs', 0) < 2 and 
-            features.get('noun_count', 0) > features.get('verb_count', 1)):
-            scores["Concept"] += 0.25
-            matched_rules.append("descriptive_language")
-        
-        # 弱规则18: 高命名实体（3-5个，适中）
-        if 3 <= features.get('named_entities', 0) <= 5:
-            scores["Concept"] += 0.15
-            matched_rules.append("moderate_named_entities")
-        
-        # 弱规则19: 无列表，无表格（纯文本）
-        if (not features.get('has_numbered_list') and 
-            not features.get('has_bullet_list') and 
-            not features.get('has_table')):
-            scores["Concept"] += 0.1
-            matched_rules.append("pure_text_no_structure")
+        # 标题关键词命中的类型
+        title_types = _title_keyword_types(chunk['title'])
+        
+        # 只评估前置条件满足的规则
+        candidates = list(_UNGATED_RULES)
+        for key, rule_ids in _FEATURE_GATED_RULES.items():
+            if features.get(key):
+                candidates.extend(rule_ids)
+        
+        # 快速路径：无任何前置条件满足（短块、纯文本），只有Concept规则可能命中
+        if not title_types and len(candidates) == len(_UNGATED_RULES):
+            return self._classify_unstructured(features)
+        
+        for type_idx in title_types:
+            candidates.extend(_TITLE_GATED_RULES[type_idx])
+        
+        # 命中的规则（按规则表顺序）
+        hits = sorted(i for i in candidates if _RULE_PREDICATES[i](features, title_types))
+        matched_rules = [_RULE_NAMES[i] for i in hits]
         
         # ==================== 决策逻辑 ====================
         
-        # 归一化分数
-        total_score = sum(scores.values())
+        # 按目标类型累加整数权重（规则表仅19条，纯Python求和比构造数组更快）
+        raw_scores = [0] * len(_TYPE_NAMES)
+        for i in hits:
+            raw_scores[_RULE_TYPES[i]] += _RULE_WEIGHTS[i]
+        total_score = sum(raw_scores)
+        
+        # 归一化并选择最高分类型（平分时取靠前的类型）
         if total_score > 0:
-            scores = {k: v / total_score for k, v in scores.items()}
+            best_idx = raw_scores.index(max(raw_scores))
+            scores = {name: raw / total_score for name, raw in zip(_TYPE_NAMES, raw_scores)}
         else:
-            # 默认Concept（最保守的选择）
+            # 默认为Concept（最保守的选择）
+            best_idx = _CONCEPT
             scores = {"Task": 0.0, "Concept": 1.0, "Reference": 0.0}
             matched_rules.append("default_concept")
         
-        # 选择最高分类型
-        best_type = max(scores, key=scores.get)
+        best_type = _TYPE_NAMES[best_idx]
         confidence = scores[best_type]
         
         logger.info(
@@ -181,4 +215,35 @@ class RuleBasedClassifier:
             "confidence": confidence,
             "scores": scores,
             "matched_rules": matched_rules
-        }
\ No newline at end of file
+        }
+    
+    def _classify_unstructured(self, features: Dict) -> Dict:
+        """
+        无前置条件满足时的快速分类
+        
+        此时只有无前置条件的两条Concept规则参与评估，其中"纯文本"规则必然命中，
+        结果恒为Concept（置信度1.0），无需打分。
+        
+        Args:
+            features: 提取的特征
+            
+        Returns:
+            分类结果（格式同classify）
+        """
+        matched_rules = [
+            _RULE_NAMES[i] for i in _UNGATED_RULES
+            if _RULE_PREDICATES[i](features, ())
+        ]
+        
+        logger.info(
+            f"  📏 规则分类: Concept "
+            f"(置信度: 1.00, "
+            f"匹配规则: {len(matched_rules)})"
+        )
+        
+        return {
+            "type": "Concept",
+            "confidence": 1.0,
+            "scores": {"Task": 0.0, "Concept": 1.0, "Reference": 0.0},
+            "matched_rules": matched_rules
+        }
@@ -4,7 +4,8 @@
 """
 from pathlib import Path
 from typing import Dict, List
-import json
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 import re
 
 from .nlp_features import NLPFeatureExtractor, extract_structural_features
@@ -19,9 +20,26 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from src.utils.logger import setup_logger
+from src.utils.config import Config
+from src.utils import json_utils
 
 logger = setup_logger('document_analyzer')
 
+# H2/H3标题行（标题与#之间的空白不跨行）
+_CHUNK_HEADING_RE = re.compile(r'^(#{2,3})[^\S\n]+(.+)$', re.MULTILINE)
+
+# ===== 特征提取工作进程（顶层函数，便于pickle） =====
+_worker_extractor = None
+
+def _init_feature_worker():
+    """工作进程初始化：每个进程只加载一次spaCy模型"""
+    global _worker_extractor
+    _worker_extractor = NLPFeatureExtractor()
+
+def _extract_nlp_features_worker(contents: List[str]) -> List[Dict]:
+    """在工作进程中批量提取一组文本的NLP特征"""
+    return _worker_extractor.extract_all_features_batch(contents)
+
 class DocumentAnalyzer:
     """
     文档语义分析器 - Layer 2核心
@@ -33,18 +51,23 @@ class DocumentAnalyzer:
     4. 结果融合（置信度加权）
     """
     
-    def __init__(self, use_ai: bool = True, chunk_size: int = 500):
+    # 块数达到该值才启用多进程特征提取（每个工作进程需单独加载spaCy模型）
+    PARALLEL_MIN_CHUNKS = 32
+    
+    def __init__(self, use_ai: bool = True, chunk_size: int = 500, n_workers: int = None):
         """
         初始化文档分析器
         
         Args:
             use_ai: 是否使用AI分类器
             chunk_size: 分块大小（字符数，用于备用分块策略）
+            n_workers: NLP特征提取的进程数（默认Config.MAX_WORKERS，1为单进程）
         """
         logger.info("🧠 初始化文档分析器...")
         
         self.chunk_size = chunk_size
         self.use_ai = use_ai
+        self.n_workers = n_workers if n_workers is not None else Config.MAX_WORKERS
         
         # 初始化NLP特征提取器
         self.nlp_extractor = NLPFeatureExtractor()
@@ -97,19 +120,18 @@ class DocumentAnalyzer:
         
         # Step 2 & 3: 特征提取 + 分类
         logger.info("\n[Step 2/3] 特征提取 + 分类...")
-        analyzed_chunks = []
         
-        for i, chunk in enumerate(chunks, 1):
-            logger.info(f"\n  [{i}/{len(chunks)}] 处理: {chunk['title'][:50]}...")
-            
-            # 提取特征
-            features = self._extract_features(chunk)
-            logger.info(f"    ✓ 特征提取完成")
-            
-            # 分类
-            classification = self.classifier.classify(chunk, features)
+        # 提取特征（spaCy批量处理所有块）
+        features_list = self._extract_features_batch(chunks)
+        logger.info(f"  ✓ 特征提取完成：{len(features_list)} 个块")
+        
+        # 分类（需要LLM的块批量发送）
+        classifications = self.classifier.classify_batch(chunks, features_list)
+        
+        analyzed_chunks = []
+        for chunk, features, classification in zip(chunks, features_list, classifications):
             logger.info(
-                f"    ✓ 分类: {classification['type']} "
+                f"    ✓ 分类 [{chunk['id']}]: {classification['type']} "
                 f"(置信度: {classification['confidence']:.2f})"
             )
             
@@ -150,36 +172,26 @@ class DocumentAnalyzer:
         Returns:
             分块列表
         """
-        # 按H2和H3标题分割
-        pattern = r'^(#{2,3})\s+(.+)$'
-        lines = content.split('\n')
+        # 单次扫描整篇文档定位H2/H3标题，块内容为相邻标题之间的切片
+        matches = list(_CHUNK_HEADING_RE.finditer(content))
         
         chunks = []
-        current_chunk = None
-        
-        for line in lines:
-            match = re.match(pattern, line)
+        for i, match in enumerate(matches):
+            if i + 1 < len(matches):
+                body = content[match.end() + 1:matches[i + 1].start()]
+            elif match.end() < len(content):
+                body = content[match.end() + 1:] + "\n"
+            else:
+                body = ""
             
-            if match:
-                # 保存上一个块
-                if current_chunk and current_chunk["content"].strip():
-                    chunks.append(current_chunk)
-                
-                # 开始新块
-                level = len(match.group(1))
-                title = match.group(2).strip()
-                current_chunk = {
+            # 仅保留含非空白内容的块
+            if body.strip():
+                chunks.append({
                     "id": f"chunk_{len(chunks) + 1}",
-                    "title": title,
-                    "level": level,
-                    "content": ""
-                }
-            elif current_chunk is not None:
-                current_chunk["content"] += line + "\n"
-        
-        # 添加最后一个块
-        if current_chunk and current_chunk["content"].strip():
-            chunks.append(current_chunk)
+                    "title": match.group(2).strip(),
+                    "level": len(match.group(1)),
+                    "content": body
+                })
         
         # 如果没有找到标题，尝试按字符数分块
         if not chunks and content.strip():
@@ -192,81 +204,122 @@ class DocumentAnalyzer:
         """按字符数分块（备用策略）"""
         chunks = []
         lines = content.split('\n')
-        current_chunk = ""
+        current_lines = []
+        current_len = 0
+        has_text = False
         chunk_id = 1
         
         for line in lines:
-            if len(current_chunk) + len(line) > self.chunk_size:
-                if current_chunk.strip():
+            if current_len + len(line) > self.chunk_size:
+                if has_text:
                     chunks.append({
                         "id": f"chunk_{chunk_id}",
                         "title": f"Section {chunk_id}",
                         "level": 2,
-                        "content": current_chunk
+                        "content": "\n".join(current_lines) + "\n"
                     })
                     chunk_id += 1
-                current_chunk = line + "\n"
+                current_lines = [line]
+                current_len = len(line) + 1
+                has_text = bool(line) and not line.isspace()
             else:
-                current_chunk += line + "\n"
+                current_lines.append(line)
+                current_len += len(line) + 1
+                if line and not line.isspace():
+                    has_text = True
         
         # 添加最后一块
-        if current_chunk.strip():
+        if has_text:
             chunks.append({
                 "id": f"chunk_{chunk_id}",
                 "title": f"Section {chunk_id}",
                 "level": 2,
-                "content": current_chunk
+                "content": "\n".join(current_lines) + "\n"
             })
         
         return chunks
     
-    def _extract_features(self, chunk: Dict) -> Dict:
+    def _extract_features_batch(self, chunks: List[Dict]) -> List[Dict]:
         """
-        提取完整特征
+        批量提取完整特征
         
         Args:
-            chunk: 文本块
+            chunks: 文本块列表
             
         Returns:
-            特征字典（NLP特征 + 结构化特征）
+            与chunks顺序一致的特征字典列表
         """
-        content = chunk["content"]
+        contents = [chunk["content"] for chunk in chunks]
         
-        # NLP特征（词性、依存、实体等）
-        nlp_features = self.nlp_extractor.extract_all_features(content)
+        # NLP特征（nlp.pipe批量解析；块多时按进程切片并行）
+        if self.n_workers > 1 and len(contents) >= self.PARALLEL_MIN_CHUNKS:
+            nlp_features_list = self._extract_nlp_features_parallel(contents)
+        else:
+            nlp_features_list = self.nlp_extractor.extract_all_features_batch(contents)
         
-        # 结构化特征（列表、表格、代码块等）
-        structural_features = extract_structural_features(content)
+        # 结构化特征
+        structural_features_list = [extract_structural_features(c) for c in contents]
         
-        # 合并
-        return {
-            **nlp_features,
-            **structural_features,
-            "title": chunk["title"],
-            "level": chunk["level"]
-        }
+        return [
+            {
+                **nlp_features,
+                **structural_features,
+                "title": chunk["title"],
+                "level": chunk["level"]
+            }
+            for chunk, nlp_features, structural_features
+            in zip(chunks, nlp_features_list, structural_features_list)
+        ]
+    
+    def _extract_nlp_features_parallel(self, contents: List[str]) -> List[Dict]:
+        """
+        多进程提取NLP特征
+        
+        文本按进程数切成连续的片段，每个工作进程对自己的片段使用nlp.pipe，
+        结果按原顺序拼接。
+        
+        Args:
+            contents: 文本列表
+            
+        Returns:
+            与contents顺序一致的NLP特征列表
+        """
+        n_workers = min(self.n_workers, len(contents))
+        slice_size = -(-len(contents) // n_workers)
+        slices = [
+            contents[i:i + slice_size]
+            for i in range(0, len(contents), slice_size)
+        ]
+        
+        logger.info(f"  ⚙️ 多进程特征提取: {len(slices)} 个进程")
+        
+        with ProcessPoolExecutor(
+            max_workers=len(slices),
+            initializer=_init_feature_worker
+        ) as executor:
+            return [
+                features
+                for slice_features in executor.map(_extract_nlp_features_worker, slices)
+                for features in slice_features
+            ]
     
     def _compute_statistics(self, chunks: List[Dict]) -> Dict:
         """计算统计信息"""
-        type_counts = {}
-        confidence_sum = {}
-        confidence_count = {}
-        needs_review_count = 0
+        type_counts = Counter()
+        confidence_sum = defaultdict(float)
+        confidence_count = Counter()
         
         for chunk in chunks:
             classification = chunk["classification"]
             ctype = classification["type"]
-            conf = classification["confidence"]
             
             # 统计类型分布
-            type_counts[ctype] = type_counts.get(ctype, 0) + 1
+            type_counts[ctype] += 1
             
             # 累计置信度（排除needs_review）
             if ctype != "needs_review":
-                confidence_sum[ctype] = confidence_sum.get(ctype, 0) + conf
-                confidence_count[ctype] = confidence_count.get(ctype, 0) + 1
-            else:
-                needs_review_count += 1
+                confidence_sum[ctype] += classification["confidence"]
+                confidence_count[ctype] += 1
         
         # 计算平均置信度
         avg_confidence = {
@@ -281,10 +334,10 @@ class DocumentAnalyzer:
         
         return {
             "total_chunks": len(chunks),
-            "type_distribution": type_counts,
+            "type_distribution": dict(type_counts),
             "average_confidence": avg_confidence,
             "overall_avg_confidence": overall_avg,
-            "needs_review": needs_review_count
+            "needs_review": type_counts["needs_review"]
         }
     
     def save_results(self, results: Dict, output_path: Path):
@@ -297,7 +350,6 @@ class DocumentAnalyzer:
         """
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(results, f, indent=2, ensure_ascii=False)
+        json_utils.dump(results, output_path)
         
         logger.info(f"💾 分析结果已保存: {output_path}")
\ No newline at end of file
@@ -3,22 +3,88 @@ NLP特征提取器
 使用spaCy进行深度NLP分析，提取Task/Concept/Reference判别特征
 """
 import spacy
-from typing import Dict, List
+from typing import Dict, List, Tuple
+from collections import Counter
 import re
 from pathlib import Path
 
+try:
+    import re2 as _structural_re  # 可选：RE2 线性时间匹配引擎，无回溯
+except ImportError:
+    _structural_re = re
+
+# ===== 预编译正则（结构化特征） =====
+# 使用内联 (?m) 标志，re 与 re2 均可编译
+_NUMBERED_LIST_RE = _structural_re.compile(r'(?m)^\d+\.')
+_BULLET_LIST_RE = _structural_re.compile(r'(?m)^[-*+]\s')
+_LIST_ITEM_RE = _structural_re.compile(r'(?m)^(\d+\.|\*|-|\+)\s')
+_HEADING_RE = _structural_re.compile(r'(?m)^(#{1,6})\s')
+_LINK_RE = _structural_re.compile(r'\[.*?\]\(.*?\)')
+_IMAGE_RE = _structural_re.compile(r'!\[.*?\]\(.*?\)')
+_TABLE_SEP_RE = _structural_re.compile(r'\|\s*:?-{3,}')
+
+# ===== 预编译正则（定义模式：X is/are/means/refers to Y） =====
+# 各模式合并为一个分支，单次扫描文本；IGNORECASE 避免额外的 lower() 拷贝
+_DEFINITION_RE = re.compile(
+    r'\b\w+ (?:'
+    r'is (?:a|an|the)?\s*\w+'
+    r'|are \w+'
+    r'|means \w+'
+    r'|refers to \w+'
+    r'|can be defined as'
+    r'|represents \w+'
+    r')',
+    re.IGNORECASE
+)
+
+# 常见Task动作动词（小写词元）
+ACTION_VERBS = frozenset({
+    'install', 'download', 'click', 'run', 'execute', 'configure',
+    'setup', 'create', 'delete', 'update', 'modify', 'copy', 'move',
+    'open', 'close', 'save', 'load', 'start', 'stop', 'restart',
+    'enable', 'disable', 'select', 'choose', 'enter', 'type', 'press',
+    'set', 'add', 'remove', 'edit', 'change', 'verify', 'check'
+})
+
+# 特征缓存容量（条目数）
+FEATURE_CACHE_SIZE = 1024
+
 class NLPFeatureExtractor:
     """NLP特征提取器 - 使用spaCy进行深度语言分析"""
     
-    def __init__(self):
-        """初始化spaCy模型"""
+    def __init__(self, enable_dep_analysis: bool = False):
+        """
+        初始化spaCy模型
+        
+        Args:
+            enable_dep_analysis: 是否运行依存句法分析器（输出dependency_patterns特征）。
+                关闭时不加载parser（spaCy中最耗时的组件），改用规则分句器sentencizer
+        """
+        self.enable_dep_analysis = enable_dep_analysis
+        exclude = [] if enable_dep_analysis else ["parser"]
         try:
-            self.nlp = spacy.load("en_core_web_sm")
+            self.nlp = spacy.load("en_core_web_sm", exclude=exclude)
         except OSError:
             print("⚠️ spaCy英文模型未安装，正在下载...")
             import os
             os.system("python -m spacy download en_core_web_sm")
-            self.nlp = spacy.load("en_core_web_sm")
+            self.nlp = spacy.load("en_core_web_sm", exclude=exclude)
+        
+        # 无parser时doc.sents由sentencizer提供
+        if not enable_dep_analysis:
+            self.nlp.add_pipe("sentencizer", first=True)
+        
+        # 词元哈希（token.lemma）查表，热循环中不再生成字符串
+        strings = self.nlp.vocab.strings
+        self._action_verb_ids = frozenset(
+            strings.add(variant)
+            for verb in ACTION_VERBS
+            for variant in (verb, verb.capitalize(), verb.upper())
+        )
+        self._be_lemma_id = strings.add("be")
+        
+        # 特征缓存：文本 → 特征字典（重复的样板段落只解析一次）
+        self._feature_cache: Dict[str, Dict] = {}
     
     def extract_all_features(self, text: str) -> Dict:
         """
@@ -30,126 +96,142 @@ class NLPFeatureExtractor:
         Returns:
             完整特征字典
         """
-        doc = self.nlp(text)
+        cached = self._feature_cache.get(text)
+        if cached is not None:
+            return dict(cached)
+        
+        features = self._features_from_doc(self.nlp(text))
+        self._cache_features(text, features)
+        return dict(features)
+    
+    def extract_all_features_batch(self, texts: List[str], batch_size: int = 32) -> List[Dict]:
+        """
+        批量提取NLP特征（使用nlp.pipe，摊薄每次调用的模型开销）
         
-        return {
+        Args:
+            texts: 输入文本列表
+            batch_size: spaCy批大小
+            
+        Returns:
+            与texts顺序一致的特征字典列表
+        """
+        # 只解析未缓存的文本（批内重复文本也只解析一次）
+        found = {text: self._feature_cache.get(text) for text in texts}
+        misses = [text for text, features in found.items() if features is None]
+        for text, doc in zip(misses, self.nlp.pipe(misses, batch_size=batch_size)):
+            features = self._features_from_doc(doc)
+            found[text] = features
+            self._cache_features(text, features)
+        
+        return [dict(found[text]) for text in texts]
+    
+    def clear_cache(self):
+        """清空特征缓存"""
+        self._feature_cache.clear()
+    
+    def _cache_features(self, text: str, features: Dict):
+        """写入特征缓存，超出容量时淘汰最早写入的条目"""
+        cache = self._feature_cache
+        if len(cache) >= FEATURE_CACHE_SIZE:
+            del cache[next(iter(cache))]
+        cache[text] = features
+    
+    def _features_from_doc(self, doc) -> Dict:
+        """从已解析的spaCy Doc计算特征"""
+        # 单次遍历token，同时统计词数、词性和动作动词
+        pos_counts = Counter()
+        word_count = 0
+        action_verbs = 0
+        action_verb_ids = self._action_verb_ids
+        for token in doc:
+            pos_counts[token.pos_] += 1
+            if not token.is_punct:
+                word_count += 1
+            if token.lemma in action_verb_ids:
+                action_verbs += 1
+        
+        # 句子只物化一次，供后续统计复用
+        sents = list(doc.sents)
+        imperative_verbs, is_statements = self._analyze_sentences(sents)
+        
+        features = {
             # === 统计特征 ===
-            "word_count": len([token for token in doc if not token.is_punct]),
-            "sentence_count": len(list(doc.sents)),
-            "avg_sentence_length": self._avg_sentence_length(doc),
+            "word_count": word_count,
+            "sentence_count": len(sents),
+            "avg_sentence_length": self._avg_sentence_length(sents),
             
             # === 词性特征 ===
-            "verb_count": len([token for token in doc if token.pos_ == "VERB"]),
-            "noun_count": len([token for token in doc if token.pos_ == "NOUN"]),
-            "adj_count": len([token for token in doc if token.pos_ == "ADJ"]),
+            "verb_count": pos_counts["VERB"],
+            "noun_count": pos_counts["NOUN"],
+            "adj_count": pos_counts["ADJ"],
             
             # === Task特征 ===
-            "imperative_verbs": self._count_imperative_verbs(doc),
-            "action_verbs": self._count_action_verbs(doc),
+            "imperative_verbs": imperative_verbs,
+            "action_verbs": action_verbs,
             
             # === Concept特征 ===
             "has_definition": self._detect_definition_pattern(doc),
-            "is_statements": self._count_is_statements(doc),
+            "is_statements": is_statements,
             
             # === Reference特征 ===
             "named_entities": len(doc.ents),
             "entity_types": [ent.label_ for ent in doc.ents],
-            
-            # === 依存关系特征 ===
-            "dependency_patterns": self._analyze_dependencies(doc)
         }
+        
+        # === 依存关系特征（仅在加载parser时可用） ===
+        if self.enable_dep_analysis:
+            dep_counts = Counter(token.dep_ for token in doc)
+            features["dependency_patterns"] = {
+                "nsubj": dep_counts["nsubj"],  # 主语
+                "dobj": dep_counts["dobj"],    # 直接宾语
+                "prep": dep_counts["prep"],    # 介词
+                "compound": dep_counts["compound"]  # 复合词
+            }
+        
+        return features
     
-    def _avg_sentence_length(self, doc) -> float:
+    def _avg_sentence_length(self, sents: List) -> float:
         """计算平均句子长度"""
-        sents = list(doc.sents)
         if not sents:
             return 0.0
         return sum(len(sent) for sent in sents) / len(sents)
     
-    def _count_imperative_verbs(self, doc) -> int:
+    def _analyze_sentences(self, sents: List) -> Tuple[int, int]:
         """
-        检测祈使句中的动词
-        规则：句首动词原形 (VB) 且不是问句
+        单次遍历句子，统计祈使句动词和"is/are"陈述句
+        
+        - 祈使句：句首动词原形 (VB) 且不是问句
+        - 陈述句：句中含有be助动词（Concept文档通常包含大量陈述性句子）
+        
+        Args:
+            sents: 句子列表（list(doc.sents)）
+            
+        Returns:
+            (祈使句动词数, "is/are"陈述句数)
         """
-        count = 0
-        for sent in doc.sents:
-            tokens = [t for t in sent if not t.is_punct and not t.is_space]
-            if tokens and tokens[0].pos_ == "VERB" and tokens[0].tag_ == "VB":
+        be_lemma_id = self._be_lemma_id
+        imperative_count = 0
+        is_count = 0
+        for sent in sents:
+            # 只需句首第一个实词，找到即停，不为整句构造token列表
+            first = next((t for t in sent if not t.is_punct and not t.is_space), None)
+            if first is not None and first.pos_ == "VERB" and first.tag_ == "VB":
                 # 排除疑问句
                 if not sent.text.strip().endswith('?'):
-                    count += 1
-        return count
-    
-    def _count_action_verbs(self, doc) -> int:
-        """
-        统计动作动词
-        常见Task动词：install, download, click, run, configure, etc.
-        """
-        action_verbs = {
-            'install', 'download', 'click', 'run', 'execute', 'configure',
-            'setup', 'create', 'delete', 'update', 'modify', 'copy', 'move',
-            'open', 'close', 'save', 'load', 'start', 'stop', 'restart',
-            'enable', 'disable', 'select', 'choose', 'enter', 'type', 'press',
-            'set', 'add', 'remove', 'edit', 'change', 'verify', 'check'
-        }
-        
-        count = 0
-        for token in doc:
-            if token.lemma_.lower() in action_verbs:
-                count += 1
-        return count
+                    imperative_count += 1
+            
+            for token in sent:
+                if token.lemma == be_lemma_id and token.pos_ == "AUX":
+                    is_count += 1
+                    break
+        return imperative_count, is_count
     
     def _detect_definition_pattern(self, doc) -> bool:
         """
         检测定义模式
         模式：X is/are/means/refers to Y
         """
-        definition_patterns = [
-            r'\b\w+ is (a|an|the)?\s*\w+',
-            r'\b\w+ are \w+',
-            r'\b\w+ means \w+',
-            r'\b\w+ refers to \w+',
-            r'\b\w+ can be defined as',
-            r'\b\w+ represents \w+'
-        ]
-        
-        text = doc.text.lower()
-        for pattern in definition_patterns:
-            if re.search(pattern, text):
-                return True
-        return False
-    
-    def _count_is_statements(self, doc) -> int:
-        """
-        统计"is/are"陈述句
-        Concept文档通常包含大量陈述性句子
-        """
-        count = 0
-        for sent in doc.sents:
-            for token in sent:
-                if token.lemma_ == "be" and token.pos_ == "AUX":
-                    count += 1
-                    break
-        return count
-    
-    def _analyze_dependencies(self, doc) -> Dict:
-        """
-        分析依存关系模式
-        
-        Returns:
-            依存关系统计
-        """
-        dep_counts = {}
-        for token in doc:
-            dep = token.dep_
-            dep_counts[dep] = dep_counts.get(dep, 0) + 1
-        
-        return {
-            "nsubj": dep_counts.get("nsubj", 0),  # 主语
-            "dobj": dep_counts.get("dobj", 0),    # 直接宾语
-            "prep": dep_counts.get("prep", 0),    # 介词
-            "compound": dep_counts.get("compound", 0)  # 复合词
-        }
+        return _DEFINITION_RE.search(doc.text) is not None
 
 
 def extract_structural_features(content: str) -> Dict:
@@ -162,32 +244,33 @@ def extract_structural_features(content: str) -> Dict:
     Returns:
         结构化特征字典
     """
+    heading_levels = [len(m.group(1)) for m in _HEADING_RE.finditer(content)]
+    table_separators = len(_TABLE_SEP_RE.findall(content))
+    code_fences = content.count('```')
+    
     return {
         # === 列表特征 ===
-        "has_numbered_list": bool(re.search(r'^\d+\.', content, re.MULTILINE)),
-        "has_bullet_list": bool(re.search(r'^[-*+]\s', content, re.MULTILINE)),
-        "list_items": len(re.findall(r'^(\d+\.|\*|-|\+)\s', content, re.MULTILINE)),
+        "has_numbered_list": bool(_NUMBERED_LIST_RE.search(content)),
+        "has_bullet_list": bool(_BULLET_LIST_RE.search(content)),
+        "list_items": len(_LIST_ITEM_RE.findall(content)),
         
         # === 表格特征 ===
-        "has_table": '|' in content and '---' in content,
-        "table_count": content.count('|---'),
+        "has_table": table_separators > 0,
+        "table_count": table_separators,
         
         # === 代码特征 ===
-        "has_code_block": '```' in content,
-        "code_blocks": content.count('```') // 2,
-        "has_inline_code": '`' in content and '```' not in content,
+        "has_code_block": code_fences > 0,
+        "code_blocks": code_fences // 2,
+        "has_inline_code": code_fences == 0 and '`' in content,
         
         # === 标题特征 ===
-        "heading_count": len(re.findall(r'^#{1,6}\s', content, re.MULTILINE)),
-        "max_heading_level": max(
-            [len(m.group(1)) for m in re.finditer(r'^(#{1,6})\s', content, re.MULTILINE)],
-            default=0
-        ),
+        "heading_count": len(heading_levels),
+        "max_heading_level": max(heading_levels, default=0),
         
         # === 链接和图片 ===
-        "has_links": bool(re.search(r'\[.*?\]\(.*?\)', content)),
-        "has_images": bool(re.search(r'!\[.*?\]\(.*?\)', content)),
-        "image_count": len(re.findall(r'!\[.*?\]\(.*?\)', content)),
+        "has_links": bool(_LINK_RE.search(content)),
+        "has_images": bool(_IMAGE_RE.search(content)),
+        "image_count": len(_IMAGE_RE.findall(content)),
         
         # === 长度特征 ===
         "char_count": len(content),
@@ -10,12 +10,17 @@ Layer 3: DITA转换层
 - TemplateRenderer: 模板渲染器
 - XMLValidator: XML验证器
 """
-from .converter import DITAConverter
-from .template_selector import TemplateSelector
-from .content_structurer import ContentStructurer
-from .constraint_engine import ConstraintEngine
-from .template_renderer import TemplateRenderer
-from .xml_validator import XMLValidator
+from importlib import import_module
+
+# 导出名 → 所在子模块（首次访问时才导入，只用到errors等轻量模块时不加载全部组件）
+_LAZY_EXPORTS = {
+    'DITAConverter': '.converter',
+    'TemplateSelector': '.template_selector',
+    'ContentStructurer': '.content_structurer',
+    'ConstraintEngine': '.constraint_engine',
+    'TemplateRenderer': '.template_renderer',
+    'XMLValidator': '.xml_validator'
+}
 
 __all__ = [
     'DITAConverter',
@@ -26,4 +31,13 @@ __all__ = [
     'XMLValidator'
 ]
 
-__version__ = '1.0.0'
\ No newline at end of file
+__version__ = '1.0.0'
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value  # 缓存，之后直接命中模块属性
+    return value
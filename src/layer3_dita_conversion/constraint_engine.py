@@ -3,131 +3,191 @@ Step 3: 语法约束引擎
 定义DITA语法规则并指导LLM生成符合规范的内容
 """
 from typing import Dict, List, Any
+from types import MappingProxyType
+from collections import Counter
 import logging
+import re
 
 from .errors import ConstraintError, DITAConversionError
 
 logger = logging.getLogger(__name__)
 
+# DITA ID规范：字母开头，只能包含字母、数字、下划线、连字符、点号
+_ID_RE = re.compile(r'^[a-zA-Z][a-zA-Z0-9_\-\.]*$')
+
+# Task至少包含的步骤数
+_TASK_MIN_STEPS = 1
+
+def _freeze(value: Any) -> Any:
+    """递归冻结约束数据：dict包装为只读映射，list转为tuple"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+def _build_constraints(constraints: Dict) -> MappingProxyType:
+    """
+    补充约束提示中用到的拼接字符串，并逐层冻结
+    
+    约束在所有实例间共享，嵌套的列表和字典也必须只读，
+    否则修改一处会影响所有引擎，并与预先拼接的字符串不一致
+    
+    Args:
+        constraints: 约束规则字典
+        
+    Returns:
+        只读约束规则
+    """
+    constraints['required_elements_csv'] = ', '.join(constraints['required_elements'])
+    if 'taskbody_order' in constraints:
+        constraints['taskbody_order_arrow'] = ' → '.join(constraints['taskbody_order'])
+    return _freeze(constraints)
+
+# Task类型的约束规则
+_TASK_CONSTRAINTS = _build_constraints({
+    'required_elements': ['title', 'taskbody'],
+    'taskbody_children': {
+        'prereq': {'min': 0, 'max': 1},
+        'context': {'min': 0, 'max': 1},
+        'steps': {'min': 1, 'max': 1},  # 必需且只能有一个
+        'result': {'min': 0, 'max': 1},
+        'example': {'min': 0, 'max': 1},
+        'postreq': {'min': 0, 'max': 1}
+    },
+    'steps_constraints': {
+        'min_steps': _TASK_MIN_STEPS,
+        'step_required_elements': ['cmd'],
+        'step_optional_elements': ['info', 'stepxmp', 'substeps', 'stepresult']
+    },
+    'element_order': [
+        'title',
+        'shortdesc',
+        'prolog',
+        'taskbody'
+    ],
+    'taskbody_order': [
+        'prereq',
+        'context',
+        'steps',
+        'result',
+        'example',
+        'postreq'
+    ],
+    'id_pattern': _ID_RE.pattern,
+    'id_regex': _ID_RE,
+    'content_rules': {
+        'cmd': {
+            'description': '步骤的主要命令，必须是明确的操作指令',
+            'allowed_children': ['text', 'ph', 'uicontrol', 'codeph'],
+            'forbidden_children': ['p', 'ul', 'ol', 'section']
+        },
+        'info': {
+            'description': '步骤的补充信息',
+            'allowed_children': ['text', 'p', 'ul', 'ol', 'note']
+        }
+    }
+})
+
+# Concept类型的约束规则
+_CONCEPT_CONSTRAINTS = _build_constraints({
+    'required_elements': ['title', 'conbody'],
+    'conbody_children': {
+        'p': {'min': 0, 'max': float('inf')},
+        'section': {'min': 0, 'max': float('inf')},
+        'example': {'min': 0, 'max': float('inf')},
+        'note': {'min': 0, 'max': float('inf')}
+    },
+    'element_order': [
+        'title',
+        'shortdesc',
+        'prolog',
+        'conbody',
+        'related-links'
+    ],
+    'id_pattern': _ID_RE.pattern,
+    'id_regex': _ID_RE,
+    'content_rules': {
+        'section': {
+            'description': '概念的子章节',
+            'required_children': [],
+            'allowed_children': ['title', 'p', 'ul', 'ol', 'note', 'example']
+        },
+        'p': {
+            'description': '段落',
+            'allowed_children': ['text', 'ph', 'term', 'cite', 'xref']
+        }
+    }
+})
+
+# Reference类型的约束规则
+_REFERENCE_CONSTRAINTS = _build_constraints({
+    'required_elements': ['title', 'refbody'],
+    'refbody_children': {
+        'section': {'min': 0, 'max': float('inf')},
+        'properties': {'min': 0, 'max': 1},
+        'refsyn': {'min': 0, 'max': 1},
+        'table': {'min': 0, 'max': float('inf')}
+    },
+    'element_order': [
+        'title',
+        'shortdesc',
+        'prolog',
+        'refbody',
+        'related-links'
+    ],
+    'properties_structure': {
+        'required_elements': ['prophead'],
+        'property_required': ['proptype', 'propvalue', 'propdesc']
+    },
+    'table_structure': {
+        'required_elements': ['tgroup'],
+        'tgroup_required': ['thead', 'tbody'],
+        'min_cols': 1
+    },
+    'id_pattern': _ID_RE.pattern,
+    'id_regex': _ID_RE
+})
+
+# Reference中不算实际内容的字段
+_REFERENCE_HEADER_KEYS = frozenset(('reference_id', 'title', 'shortdesc'))
+
+# 错误关键字 → 修复建议（按顺序匹配，取第一个命中的规则）
+_FIX_RULES = (
+    ("缺少必需元素", "添加缺失的元素到结构化数据中"),
+    ("steps数量不足", "至少添加一个步骤到steps数组"),
+    ("缺少必需字段: cmd", "为每个step添加cmd字段，描述具体操作"),
+    ("必须包含introduction或sections", "添加introduction字段或至少一个section"),
+)
+
 class ConstraintEngine:
     """DITA语法约束引擎"""
     
+    # 定义DITA规范约束（静态数据，所有实例共享，只读）
+    constraints = MappingProxyType({
+        'Task': _TASK_CONSTRAINTS,
+        'Concept': _CONCEPT_CONSTRAINTS,
+        'Reference': _REFERENCE_CONSTRAINTS
+    })
+    
     def __init__(self):
         """初始化约束引擎"""
-        # 定义DITA规范约束
-        self.constraints = {
-            'Task': self._task_constraints(),
-            'Concept': self._concept_constraints(),
-            'Reference': self._reference_constraints()
+        # 内容类型 → 特定结构验证方法 / 约束提示生成方法
+        self._validators = {
+            'Task': self._validate_task_structure,
+            'Concept': self._validate_concept_structure,
+            'Reference': self._validate_reference_structure
         }
+        self._prompters = {
+            'Task': self._task_constraint_prompt,
+            'Concept': self._concept_constraint_prompt,
+            'Reference': self._reference_constraint_prompt
+        }
+        # 约束提示只取决于内容类型，生成一次后缓存
+        self._prompt_cache: Dict[str, str] = {}
         
         logger.info("✅ 语法约束引擎初始化完成")
     
-    def _task_constraints(self) -> Dict:
-        """Task类型的约束规则"""
-        return {
-            'required_elements': ['title', 'taskbody'],
-            'taskbody_children': {
-                'prereq': {'min': 0, 'max': 1},
-                'context': {'min': 0, 'max': 1},
-                'steps': {'min': 1, 'max': 1},  # 必需且只能有一个
-                'result': {'min': 0, 'max': 1},
-                'example': {'min': 0, 'max': 1},
-                'postreq': {'min': 0, 'max': 1}
-            },
-            'steps_constraints': {
-                'min_steps': 1,
-                'step_required_elements': ['cmd'],
-                'step_optional_elements': ['info', 'stepxmp', 'substeps', 'stepresult']
-            },
-            'element_order': [
-                'title',
-                'shortdesc',
-                'prolog',
-                'taskbody'
-            ],
-            'taskbody_order': [
-                'prereq',
-                'context',
-                'steps',
-                'result',
-                'example',
-                'postreq'
-            ],
-            'id_pattern': r'^[a-zA-Z][a-zA-Z0-9_\-\.]*$',
-            'content_rules': {
-                'cmd': {
-                    'description': '步骤的主要命令，必须是明确的操作指令',
-                    'allowed_children': ['text', 'ph', 'uicontrol', 'codeph'],
-                    'forbidden_children': ['p', 'ul', 'ol', 'section']
-                },
-                'info': {
-                    'description': '步骤的补充信息',
-                    'allowed_children': ['text', 'p', 'ul', 'ol', 'note']
-                }
-            }
-        }
-    
-    def _concept_constraints(self) -> Dict:
-        """Concept类型的约束规则"""
-        return {
-            'required_elements': ['title', 'conbody'],
-            'conbody_children': {
-                'p': {'min': 0, 'max': float('inf')},
-                'section': {'min': 0, 'max': float('inf')},
-                'example': {'min': 0, 'max': float('inf')},
-                'note': {'min': 0, 'max': float('inf')}
-            },
-            'element_order': [
-                'title',
-                'shortdesc',
-                'prolog',
-                'conbody',
-                'related-links'
-            ],
-            'id_pattern': r'^[a-zA-Z][a-zA-Z0-9_\-\.]*$',
-            'content_rules': {
-                'section': {
-                    'description': '概念的子章节',
-                    'required_children': [],
-                    'allowed_children': ['title', 'p', 'ul', 'ol', 'note', 'example']
-                },
-                'p': {
-                    'description': '段落',
-                    'allowed_children': ['text', 'ph', 'term', 'cite', 'xref']
-                }
-            }
-        }
-    
-    def _reference_constraints(self) -> Dict:
-        """Reference类型的约束规则"""
-        return {
-            'required_elements': ['title', 'refbody'],
-            'refbody_children': {
-                'section': {'min': 0, 'max': float('inf')},
-                'properties': {'min': 0, 'max': 1},
-                'refsyn': {'min': 0, 'max': 1},
-                'table': {'min': 0, 'max': float('inf')}
-            },
-            'element_order': [
-                'title',
-                'shortdesc',
-                'prolog',
-                'refbody',
-                'related-links'
-            ],
-            'properties_structure': {
-                'required_elements': ['prophead'],
-                'property_required': ['proptype', 'propvalue', 'propdesc']
-            },
-            'table_structure': {
-                'required_elements': ['tgroup'],
-                'tgroup_required': ['thead', 'tbody'],
-                'min_cols': 1
-            },
-            'id_pattern': r'^[a-zA-Z][a-zA-Z0-9_\-\.]*$'
-        }
-    
     def get_constraints(self, content_type: str) -> Dict:
         """
         获取指定类型的约束规则
@@ -163,18 +223,17 @@ class ConstraintEngine:
         errors = []
         warnings = []
         
-        # 验证必需元素
-        for required in constraints['required_elements']:
-            if required not in structured_data and f"{required}_id" not in structured_data:
-                errors.append(f"缺少必需元素: {required}")
+        # 验证必需元素（元素本身或对应的 xxx_id 字段存在即可）
+        provided = set(structured_data)
+        provided.update(key[:-3] for key in structured_data if key.endswith('_id'))
+        errors.extend(
+            f"缺少必需元素: {required}"
+            for required in constraints['required_elements']
+            if required not in provided
+        )
         
-        # 根据类型进行特定验证
-        if content_type == 'Task':
-            errors.extend(self._validate_task_structure(structured_data, constraints))
-        elif content_type == 'Concept':
-            errors.extend(self._validate_concept_structure(structured_data, constraints))
-        elif content_type == 'Reference':
-            errors.extend(self._validate_reference_structure(structured_data, constraints))
+        # 根据类型进行特定验证（get_constraints已拒绝不支持的类型）
+        errors.extend(self._validators[content_type](structured_data))
         
         is_valid = len(errors) == 0
         
@@ -189,30 +248,30 @@ class ConstraintEngine:
             'warnings': warnings
         }
     
-    def _validate_task_structure(self, data: Dict, constraints: Dict) -> List[str]:
+    def _validate_task_structure(self, data: Dict) -> List[str]:
         """验证Task特定结构"""
         errors = []
         
         # 验证steps
         steps = data.get('steps', [])
-        min_steps = constraints['steps_constraints']['min_steps']
         
-        if len(steps) < min_steps:
-            errors.append(f"steps数量不足: 需要至少{min_steps}个，实际{len(steps)}个")
+        if len(steps) < _TASK_MIN_STEPS:
+            errors.append(f"steps数量不足: 需要至少{_TASK_MIN_STEPS}个，实际{len(steps)}个")
         
         # 验证每个step的结构
+        # EAFP：直接按键取cmd。字典缺键抛KeyError；字符串、列表、None等
+        # 非字典抛TypeError（不能用 'cmd' in step，字符串会做子串匹配）
         for i, step in enumerate(steps):
-            if not isinstance(step, dict):
-                errors.append(f"第{i+1}个step格式错误: 必须是字典")
-                continue
-            
-            # 检查必需的cmd字段
-            if 'cmd' not in step:
+            try:
+                step['cmd']
+            except KeyError:
                 errors.append(f"第{i+1}个step缺少必需字段: cmd")
+            except TypeError:
+                errors.append(f"第{i+1}个step格式错误: 必须是字典")
         
         return errors
     
-    def _validate_concept_structure(self, data: Dict, constraints: Dict) -> List[str]:
+    def _validate_concept_structure(self, data: Dict) -> List[str]:
         """验证Concept特定结构"""
         errors = []
         
@@ -220,45 +279,49 @@ class ConstraintEngine:
         if not data.get('introduction') and not data.get('sections'):
             errors.append("Concept必须包含introduction或sections")
         
-        # 检查sections中的ID唯一性
+        # 检查sections中的ID格式和唯一性
         sections = data.get('sections', [])
-        id_set = set()
-        for section in sections:
-            if 'id' in section:
-                if section['id'] in id_set:
-                    errors.append(f"ID重复: {section['id']}")
-                else:
-                    id_set.add(section['id'])
+        ids = [section['id'] for section in sections if 'id' in section]
+        errors.extend(
+            f"ID格式无效: {section_id}"
+            for section_id in ids
+            if not isinstance(section_id, str) or not _ID_RE.match(section_id)
+        )
+        errors.extend(
+            f"ID重复: {section_id}"
+            for section_id, count in Counter(ids).items()
+            if count > 1
+        )
         
         return errors
     
-    def _validate_reference_structure(self, data: Dict, constraints: Dict) -> List[str]:
+    def _validate_reference_structure(self, data: Dict) -> List[str]:
         """验证Reference特定结构"""
         errors = []
         
         # Reference应该有properties或table或sections
-        has_content = any([
-            data.get('properties'),
-            data.get('table'),
+        has_content = bool(
+            data.get('properties') or
+            data.get('table') or
             data.get('sections')
-        ])
+        )
         
         # 放宽约束：如果没有这些结构，但有其他内容，也可以接受
         # 这是为了兼容各种Reference类型的文档
         if not has_content:
-            # 检查是否有其他内容
-            has_other_content = any([
-                data.get('title'),
-                data.get('shortdesc'),
+            # 检查是否有其他内容（短路求值，找到即停）
+            has_other_content = bool(
+                data.get('title') or
+                data.get('shortdesc') or
                 # 检查是否有其他字段
-                any(key not in ['reference_id', 'title', 'shortdesc'] for key in data.keys())
-            ])
+                any(key not in _REFERENCE_HEADER_KEYS for key in data)
+            )
             
             if not has_other_content:
                 errors.append("Reference必须包含properties、table或sections中的至少一项")
             else:
                 # 只有标题和短描述是不够的，需要有实际内容
-                if list(data.keys()) == ['reference_id', 'title', 'shortdesc']:
+                if data.keys() == _REFERENCE_HEADER_KEYS:
                     errors.append("Reference必须包含properties、table或sections中的至少一项")
         
         # 验证table结构
@@ -281,24 +344,22 @@ class ConstraintEngine:
         Returns:
             约束说明文本
         """
-        constraints = self.get_constraints(content_type)
-        
-        if content_type == 'Task':
-            return self._task_constraint_prompt(constraints)
-        elif content_type == 'Concept':
-            return self._concept_constraint_prompt(constraints)
-        elif content_type == 'Reference':
-            return self._reference_constraint_prompt(constraints)
+        prompt = self._prompt_cache.get(content_type)
+        if prompt is None:
+            constraints = self.get_constraints(content_type)
+            prompt = self._prompters[content_type](constraints)
+            self._prompt_cache[content_type] = prompt
+        return prompt
     
     def _task_constraint_prompt(self, constraints: Dict) -> str:
         """生成Task约束提示"""
         return f"""
 DITA Task 约束规则:
 
-1. 必需元素: {', '.join(constraints['required_elements'])}
+1. 必需元素: {constraints['required_elements_csv']}
 
 2. <taskbody> 结构:
-   - 元素顺序: {' → '.join(constraints['taskbody_order'])}
+   - 元素顺序: {constraints['taskbody_order_arrow']}
    - <steps> 是必需的，且至少包含 {constraints['steps_constraints']['min_steps']} 个 <step>
 
 3. <step> 结构:
@@ -335,7 +396,7 @@ DITA Task 约束规则:
         return f"""
 DITA Concept 约束规则:
 
-1. 必需元素: {', '.join(constraints['required_elements'])}
+1. 必需元素: {constraints['required_elements_csv']}
 
 2. <conbody> 结构:
    - 通常以 <p> 开头提供概述
@@ -373,7 +434,7 @@ DITA Concept 约束规则:
         return f"""
 DITA Reference 约束规则:
 
-1. 必需元素: {', '.join(constraints['required_elements'])}
+1. 必需元素: {constraints['required_elements_csv']}
 
 2. <refbody> 结构:
    - <properties>: 用于参数列表、配置项
@@ -426,14 +487,10 @@ DITA Reference 约束规则:
         suggestions = []
         
         for error in errors:
-            if "缺少必需元素" in error:
-                suggestions.append(f"添加缺失的元素到结构化数据中")
-            elif "steps数量不足" in error:
-                suggestions.append("至少添加一个步骤到steps数组")
-            elif "缺少必需字段: cmd" in error:
-                suggestions.append("为每个step添加cmd字段，描述具体操作")
-            elif "必须包含introduction或sections" in error:
-                suggestions.append("添加introduction字段或至少一个section")
+            for key, suggestion in _FIX_RULES:
+                if key in error:
+                    suggestions.append(suggestion)
+                    break
             else:
                 suggestions.append(f"检查并修复: {error}")
         
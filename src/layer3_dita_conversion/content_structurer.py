@@ -2,16 +2,148 @@
 Step 2: 内容结构化器
 使用LLM将非结构化内容转换为结构化数据
 """
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple, Union, Callable
+from functools import lru_cache
 import logging
+import hashlib
 import json
 import re
+import threading
+
+try:
+    import fastjsonschema  # 可选：将JSON Schema编译为专用校验函数
+except ImportError:
+    fastjsonschema = None
 
 from src.utils.ai_service import AIService
+from src.utils import json_utils
 from .errors import StructureError, DITAConversionError
 
 logger = logging.getLogger(__name__)
 
+# ===== 预编译正则 =====
+# LLM响应中的markdown代码块标记
+_RE_JSON_FENCE = re.compile(r'```json\s*')
+_RE_FENCE_END = re.compile(r'```\s*$')
+# 行注释（JSON修复）
+_RE_JS_COMMENT = re.compile(r'//.*?\n')
+# 编号列表 / 破折号列表（规则提取Task步骤）；单次MULTILINE扫描，
+# group(1)非空表示编号项。行内空白用[^\S\n]，不跨行匹配
+_RE_STEPS = re.compile(r'(?m)^[^\S\n]*(?:(\d+)\.|[-*])[^\S\n]*(.+)$')
+# Markdown表格分隔线 |---|---|（MULTILINE扫描，空白不跨行）
+_RE_TABLE_SEP = re.compile(r'(?m)^[^\S\n]*\|(?:[^\S\n]|[\-:])+\|')
+# ID清理：非法字符、连续空白
+_RE_ID_CLEAN = re.compile(r'[^a-z0-9\s_-]')
+_RE_WS = re.compile(r'\s+')
+
+# ===== LLM结构化结果的JSON结构（对应各提示词的输出格式） =====
+# 非空对象；后续流程按列表处理的字段必须是数组
+_RESPONSE_SCHEMAS = {
+    'Task': {
+        'type': 'object',
+        'required': ['steps'],
+        'properties': {
+            'steps': {'type': 'array'},
+            'prerequisites': {'type': ['array', 'string', 'null']}
+        }
+    },
+    'Concept': {
+        'type': 'object',
+        'minProperties': 1,
+        'properties': {
+            'sections': {'type': 'array'}
+        }
+    },
+    'Reference': {
+        'type': 'object',
+        'minProperties': 1,
+        'properties': {
+            'properties': {'type': ['array', 'null']},
+            'table': {'type': ['object', 'null']},
+            'sections': {'type': 'array'}
+        }
+    }
+}
+
+_JSON_TYPES = {'object': dict, 'array': list, 'string': str, 'null': type(None)}
+
+def _check_schema(schema: Dict, data: Any, path: str = 'data'):
+    """
+    按上面用到的JSON Schema子集（type/required/minProperties/properties）校验数据
+    （未安装fastjsonschema时使用）
+    
+    Raises:
+        ValueError: 数据不符合schema
+    """
+    types = schema.get('type')
+    if types is not None:
+        if isinstance(types, str):
+            types = [types]
+        if not isinstance(data, tuple(_JSON_TYPES[t] for t in types)):
+            raise ValueError(f"{path} must be {' or '.join(types)}")
+    
+    if isinstance(data, dict):
+        if len(data) < schema.get('minProperties', 0):
+            raise ValueError(f"{path} must contain at least {schema['minProperties']} properties")
+        for key in schema.get('required', ()):
+            if key not in data:
+                raise ValueError(f"{path} must contain ['{key}'] properties")
+        for key, sub_schema in schema.get('properties', {}).items():
+            if key in data:
+                _check_schema(sub_schema, data[key], f"{path}.{key}")
+
+def _compile_schema(schema: Dict) -> Callable[[Any], Any]:
+    """编译schema为校验函数（失败时抛出ValueError的子类）"""
+    if fastjsonschema is not None:
+        return fastjsonschema.compile(schema)
+    return lambda data: _check_schema(schema, data)
+
+_RESPONSE_VALIDATORS = {
+    content_type: _compile_schema(schema)
+    for content_type, schema in _RESPONSE_SCHEMAS.items()
+}
+
+# LLM响应缓存：hash(模型 + 提示词) → 通过验证的原始响应，所有实例共享
+# （转换器每次转换都会新建ContentStructurer）
+RESPONSE_CACHE_SIZE = 256
+_RESPONSE_CACHE: Dict[str, str] = {}
+
+_RESPONSE_CACHE_LOCK = threading.Lock()
+
+def _cache_response(cache_key: str, response: str):
+    """写入响应缓存，超出容量时淘汰最早写入的条目（加锁，支持多线程批量转换）"""
+    with _RESPONSE_CACHE_LOCK:
+        if cache_key not in _RESPONSE_CACHE and len(_RESPONSE_CACHE) >= RESPONSE_CACHE_SIZE:
+            _RESPONSE_CACHE.pop(next(iter(_RESPONSE_CACHE)), None)
+        _RESPONSE_CACHE[cache_key] = response
+
+def clear_response_cache():
+    """清空LLM响应缓存"""
+    _RESPONSE_CACHE.clear()
+
+@lru_cache(maxsize=1024)
+def _base_id(title: str) -> str:
+    """
+    将标题转换为符合DITA规范的基础ID（纯函数，按标题缓存）
+    
+    Args:
+        title: 标题
+        
+    Returns:
+        基础ID（未做唯一性处理）
+    """
+    # 转小写，移除特殊字符，空格替换为下划线
+    id_str = title.lower()
+    id_str = _RE_ID_CLEAN.sub('', id_str)
+    id_str = _RE_WS.sub('_', id_str)
+    id_str = id_str.strip('_')
+    
+    # ID必须以字母开头
+    if id_str and not id_str[0].isalpha():
+        id_str = 'id_' + id_str
+    
+    return id_str or 'unnamed'
+
 class ContentStructurer:
     """内容结构化器 - 使用LLM提取结构"""
     
@@ -26,8 +158,25 @@ class ContentStructurer:
         self.ai_service = AIService() if use_ai else None
         self.used_ids = set()  # 跟踪已使用的ID，确保唯一性
         
+        # 内容类型 → 结构化方法
+        self._structurers = {
+            'Task': self._structure_task,
+            'Concept': self._structure_concept,
+            'Reference': self._structure_reference
+        }
+        # 内容类型 → LLM提示词构建方法
+        self._prompt_builders = {
+            'Task': self._build_task_prompt,
+            'Concept': self._build_concept_prompt,
+            'Reference': self._build_reference_prompt
+        }
+        
         logger.info(f"✅ 内容结构化器初始化完成 (AI: {use_ai})")
     
+    def reset(self):
+        """清空已使用的ID记录（每篇独立文档转换前调用）"""
+        self.used_ids.clear()
+    
     def structure_content(
         self,
         content: str,
@@ -50,41 +199,161 @@ class ContentStructurer:
         logger.info(f"🔨 开始结构化: {content_type} - {title}")
         
         # 根据类型选择结构化方法
-        if content_type == 'Task':
-            result = self._structure_task(content, title, metadata)
-        elif content_type == 'Concept':
-            result = self._structure_concept(content, title, metadata)
-        elif content_type == 'Reference':
-            result = self._structure_reference(content, title, metadata)
-        else:
+        structurer = self._structurers.get(content_type)
+        if structurer is None:
             raise StructureError(
                 f"不支持的内容类型: {content_type}",
                 "UNSUPPORTED_CONTENT_TYPE"
             )
         
+        result = structurer(content, title, metadata)
+        
         # 确保生成的ID唯一
         if result:
             self._ensure_unique_ids(result)
         
         return result
     
-    def _structure_task(self, content: str, title: str, metadata: Dict) -> Dict:
-        """结构化Task类型内容"""
+    def structure_content_batch(
+        self,
+        items: List[Tuple[str, str, str, Dict]]
+    ) -> List[Dict[str, Any]]:
+        """
+        批量结构化内容
+        
+        所有LLM请求并发发出（AIService.generate_batch），
+        响应返回后按输入顺序依次解析，ID分配顺序与逐个调用structure_content一致。
+        单个请求失败时该项自动降级到规则提取。
+        
+        Args:
+            items: (content, title, content_type, metadata) 元组列表
+            
+        Returns:
+            与items顺序一致的结构化数据列表
+        """
+        for _, _, content_type, _ in items:
+            if content_type not in self._structurers:
+                raise StructureError(
+                    f"不支持的内容类型: {content_type}",
+                    "UNSUPPORTED_CONTENT_TYPE"
+                )
+        
+        logger.info(f"🔨 开始批量结构化: {len(items)} 项")
+        
+        # 并发请求LLM（已缓存的响应不再请求）；提示词和缓存键只构建一次，随响应传给各结构化方法
+        prefetched = [None] * len(items)
+        if self.use_ai:
+            prompts = [
+                self._prompt_builders[content_type](content, title)
+                for content, title, content_type, _ in items
+            ]
+            cache_keys = [self._response_cache_key(prompt) for prompt in prompts]
+            responses = [_RESPONSE_CACHE.get(cache_key) for cache_key in cache_keys]
+            
+            misses = [i for i, response in enumerate(responses) if response is None]
+            fetched = self.ai_service.generate_batch(
+                [prompts[i] for i in misses], return_exceptions=True
+            )
+            for i, response in zip(misses, fetched):
+                responses[i] = response
+            
+            prefetched = list(zip(cache_keys, responses))
+        
+        results = []
+        for (content, title, content_type, metadata), item_prefetched in zip(items, prefetched):
+            result = self._structurers[content_type](content, title, metadata, item_prefetched)
+            if result:
+                self._ensure_unique_ids(result)
+            results.append(result)
+        
+        return results
+    
+    def _resolve_response(
+        self,
+        prompt_builder: Callable[[str, str], str],
+        content: str,
+        title: str,
+        prefetched: Optional[Tuple[str, Union[str, Exception]]]
+    ) -> Tuple[str, str]:
+        """
+        获取LLM响应
+        
+        已有批量预取结果时直接使用（不再构建提示词和缓存键，失败的请求重新抛出其异常）；
+        否则构建提示词，先查响应缓存，未命中再发起请求。
+        
+        Args:
+            prompt_builder: 提示词构建方法
+            content: 原始内容
+            title: 标题
+            prefetched: 批量请求预先取得的(缓存键, 响应或异常)
+            
+        Returns:
+            (LLM原始响应, 缓存键)
+        """
+        if prefetched is not None:
+            cache_key, response = prefetched
+            if isinstance(response, Exception):
+                raise response
+            return response, cache_key
+        
+        prompt = prompt_builder(content, title)
+        cache_key = self._response_cache_key(prompt)
+        
+        response = _RESPONSE_CACHE.get(cache_key)
+        if response is None:
+            response = self.ai_service.generate(prompt)
+        else:
+            logger.debug("✓ 命中LLM响应缓存")
+        
+        return response, cache_key
+    
+    def _validate_response_schema(self, content_type: str, structured_data: Any):
+        """
+        按内容类型的JSON结构校验LLM结构化结果
+        
+        Args:
+            content_type: 内容类型
+            structured_data: 解析后的JSON
+            
+        Raises:
+            StructureError: 结构不符合预期
+        """
+        try:
+            _RESPONSE_VALIDATORS[content_type](structured_data)
+        except ValueError as e:
+            raise StructureError(
+                f"结构化结果无效: {e}",
+                "INVALID_STRUCTURED_DATA"
+            )
+    
+    def _response_cache_key(self, prompt: str) -> str:
+        """响应缓存键：模型 + 提示词（提示词已包含内容类型、标题和内容）"""
+        key_source = f"{self.ai_service.provider}:{self.ai_service.model}\x00{prompt}"
+        return hashlib.blake2b(key_source.encode('utf-8'), digest_size=16).hexdigest()
+    
+    def _structure_task(
+        self,
+        content: str,
+        title: str,
+        metadata: Dict,
+        prefetched: Optional[Tuple[str, Union[str, Exception]]] = None
+    ) -> Dict:
+        """结构化Task类型内容（prefetched为批量请求预先取得的(缓存键, 响应)）"""
         
         structured_data = None
         
         if self.use_ai:
             try:
-                prompt = self._build_task_prompt(content, title)
-                response = self.ai_service.generate(prompt)
+                response, cache_key = self._resolve_response(
+                    self._build_task_prompt, content, title, prefetched
+                )
                 structured_data = self._parse_json_response(response)
                 
                 # 验证结构化结果是否有效
-                if not structured_data or 'steps' not in structured_data:
-                    raise StructureError(
-                        "结构化结果无效，缺少必要字段",
-                        "INVALID_STRUCTURED_DATA"
-                    )
+                self._validate_response_schema('Task', structured_data)
+                
+                # 有效响应写入缓存
+                _cache_response(cache_key, response)
                     
             except Exception as e:
                 logger.warning(f"⚠️ LLM结构化Task失败: {e}，自动降级到规则提取")
@@ -103,23 +372,29 @@ class ContentStructurer:
         
         return structured_data
     
-    def _structure_concept(self, content: str, title: str, metadata: Dict) -> Dict:
-        """结构化Concept类型内容"""
+    def _structure_concept(
+        self,
+        content: str,
+        title: str,
+        metadata: Dict,
+        prefetched: Optional[Tuple[str, Union[str, Exception]]] = None
+    ) -> Dict:
+        """结构化Concept类型内容（prefetched为批量请求预先取得的(缓存键, 响应)）"""
         
         structured_data = None
         
         if self.use_ai:
             try:
-                prompt = self._build_concept_prompt(content, title)
-                response = self.ai_service.generate(prompt)
+                response, cache_key = self._resolve_response(
+                    self._build_concept_prompt, content, title, prefetched
+                )
                 structured_data = self._parse_json_response(response)
                 
                 # 验证结构化结果是否有效
-                if not structured_data:
-                    raise StructureError(
-                        "结构化结果无效",
-                        "INVALID_STRUCTURED_DATA"
-                    )
+                self._validate_response_schema('Concept', structured_data)
+                
+                # 有效响应写入缓存
+                _cache_response(cache_key, response)
                     
             except Exception as e:
                 logger.warning(f"⚠️ LLM结构化Concept失败: {e}，自动降级到规则提取")
@@ -137,23 +412,29 @@ class ContentStructurer:
         
         return structured_data
     
-    def _structure_reference(self, content: str, title: str, metadata: Dict) -> Dict:
-        """结构化Reference类型内容"""
+    def _structure_reference(
+        self,
+        content: str,
+        title: str,
+        metadata: Dict,
+        prefetched: Optional[Tuple[str, Union[str, Exception]]] = None
+    ) -> Dict:
+        """结构化Reference类型内容（prefetched为批量请求预先取得的(缓存键, 响应)）"""
         
         structured_data = None
         
         if self.use_ai:
             try:
-                prompt = self._build_reference_prompt(content, title)
-                response = self.ai_service.generate(prompt)
+                response, cache_key = self._resolve_response(
+                    self._build_reference_prompt, content, title, prefetched
+                )
                 structured_data = self._parse_json_response(response)
                 
                 # 验证结构化结果是否有效
-                if not structured_data:
-                    raise StructureError(
-                        "结构化结果无效",
-                        "INVALID_STRUCTURED_DATA"
-                    )
+                self._validate_response_schema('Reference', structured_data)
+                
+                # 有效响应写入缓存
+                _cache_response(cache_key, response)
                     
             except Exception as e:
                 logger.warning(f"⚠️ LLM结构化Reference失败: {e}，自动降级到规则提取")
@@ -292,16 +573,27 @@ class ContentStructurer:
             解析后的字典
         """
         try:
-            # 移除可能的markdown代码块标记
-            response = re.sub(r'```json\s*', '', response)
-            response = re.sub(r'```\s*$', '', response)
+            # 移除首尾的markdown代码块标记（常见情况只需字符串操作）
             response = response.strip()
+            if response.startswith('```json'):
+                response = response[7:].lstrip()
+            elif response.startswith('```'):
+                response = response[3:].lstrip()
+            if response.endswith('```'):
+                response = response[:-3].rstrip()
             
-            data = json.loads(response)
+            # 代码块不在首尾（如前面有说明文字）时回退到正则清理
+            if '```' in response:
+                response = _RE_JSON_FENCE.sub('', response)
+                response = _RE_FENCE_END.sub('', response)
+                response = response.strip()
+            
+            data = json_utils.loads(response)
             logger.debug(f"✓ JSON解析成功")
             return data
             
         except json.JSONDecodeError as e:
+            # orjson.JSONDecodeError是json.JSONDecodeError的子类
             logger.error(f"❌ JSON解析失败: {e}")
             logger.debug(f"原始响应: {response[:200]}")
             
@@ -310,14 +602,15 @@ class ContentStructurer:
     
     def _try_fix_json(self, response: str) -> Dict:
         """尝试修复常见的JSON错误"""
-        # 尝试1: 移除注释
-        response = re.sub(r'//.*?\n', '\n', response)
+        # 尝试1: 移除注释（大多数响应没有注释，先做廉价的子串检查）
+        if '//' in response:
+            response = _RE_JS_COMMENT.sub('\n', response)
         
         # 尝试2: 修复未闭合的引号
         # ... 更多修复逻辑
         
         try:
-            return json.loads(response)
+            return json_utils.loads(response)
         except:
             logger.error("JSON修复失败，返回空结构")
             return {}
@@ -326,28 +619,20 @@ class ContentStructurer:
     
     def _extract_task_by_rules(self, content: str, title: str) -> Dict:
         """使用规则提取Task结构（不依赖LLM）"""
-        steps = []
-        
-        # 匹配编号列表 (1. xxx, 2. xxx)
-        numbered_pattern = r'^\s*(\d+)\.\s*(.+)$'
-        for line in content.split('\n'):
-            match = re.match(numbered_pattern, line)
-            if match:
-                steps.append({
-                    'cmd': match.group(2).strip(),
-                    'info': None
-                })
-        
-        # 如果没有找到编号列表，尝试破折号列表
-        if not steps:
-            bullet_pattern = r'^\s*[-*]\s*(.+)$'
-            for line in content.split('\n'):
-                match = re.match(bullet_pattern, line)
-                if match:
-                    steps.append({
-                        'cmd': match.group(1).strip(),
-                        'info': None
-                    })
+        # 单次扫描同时收集编号列表 (1. xxx) 和破折号列表 (- xxx) 项
+        numbered_items = []
+        bullet_items = []
+        for match in _RE_STEPS.finditer(content):
+            if match.group(1) is not None:
+                numbered_items.append(match.group(2))
+            else:
+                bullet_items.append(match.group(2))
+        
+        # 优先使用编号列表，没有时使用破折号列表
+        steps = [
+            {'cmd': item.strip(), 'info': None}
+            for item in (numbered_items or bullet_items)
+        ]
         
         return {
             'task_id': self._generate_id(title),
@@ -360,7 +645,7 @@ class ContentStructurer:
     def _extract_concept_by_rules(self, content: str, title: str) -> Dict:
         """使用规则提取Concept结构"""
         # 简单分段
-        paragraphs = [p.strip() for p in content.split('\n\n') if p.strip()]
+        paragraphs = [p for p in map(str.strip, content.split('\n\n')) if p]
         
         sections = []
         for i, para in enumerate(paragraphs):
@@ -391,29 +676,30 @@ class ContentStructurer:
     
     def _detect_markdown_table(self, content: str) -> Dict:
         """检测Markdown表格"""
-        lines = content.split('\n')
-        
-        for i, line in enumerate(lines):
-            # 检测表格分隔线 |---|---|
-            if re.match(r'\s*\|[\s\-:]+\|', line):
-                if i > 0:
-                    # 上一行是表头
-                    header_line = lines[i-1]
-                    headers = [cell.strip() for cell in header_line.split('|')[1:-1]]
-                    
-                    # 后续行是数据
-                    rows = []
-                    for data_line in lines[i+1:]:
-                        if not data_line.strip() or not '|' in data_line:
-                            break
-                        cells = [cell.strip() for cell in data_line.split('|')[1:-1]]
-                        if cells:
-                            rows.append(cells)
-                    
-                    return {
-                        'columns': headers,
-                        'rows': rows
-                    }
+        # 单次扫描定位分隔线；首行的分隔线没有表头，跳过
+        for match in _RE_TABLE_SEP.finditer(content):
+            sep_start = match.start()
+            if sep_start == 0:
+                continue
+            
+            # 上一行是表头
+            header_start = content.rfind('\n', 0, sep_start - 1) + 1
+            header_line = content[header_start:sep_start - 1]
+            headers = [cell.strip() for cell in header_line.split('|')[1:-1]]
+            
+            # 后续行是数据
+            rows = []
+            for data_line in content[sep_start:].split('\n')[1:]:
+                if not data_line.strip() or not '|' in data_line:
+                    break
+                cells = [cell.strip() for cell in data_line.split('|')[1:-1]]
+                if cells:
+                    rows.append(cells)
+            
+            return {
+                'columns': headers,
+                'rows': rows
+            }
         
         return None
     
@@ -429,18 +715,8 @@ class ContentStructurer:
         Returns:
             符合规范的ID字符串
         """
-        # 转小写，移除特殊字符，空格替换为下划线
-        id_str = title.lower()
-        id_str = re.sub(r'[^a-z0-9\s_-]', '', id_str)
-        id_str = re.sub(r'\s+', '_', id_str)
-        id_str = id_str.strip('_')
-        
-        # ID必须以字母开头
-        if id_str and not id_str[0].isalpha():
-            id_str = 'id_' + id_str
-        
         # 确保ID唯一
-        base_id = id_str or 'unnamed'
+        base_id = _base_id(title)
         unique_id = base_id
         counter = 1
         
@@ -3,20 +3,78 @@ Layer 3 主转换器
 协调所有步骤，将分类后的内容转换为DITA XML
 """
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor
 import logging
-import json
+import os
+import queue
+import re
 from datetime import datetime
 
-from .template_selector import TemplateSelector
-from .content_structurer import ContentStructurer
-from .constraint_engine import ConstraintEngine
-from .template_renderer import TemplateRenderer
-from .xml_validator import XMLValidator
 from .errors import ErrorHandler, DITAConversionError, ConverterError, StructureError, TemplateError, ConstraintError
+from src.utils import json_utils
+
+if TYPE_CHECKING:
+    from .content_structurer import ContentStructurer
 
 logger = logging.getLogger(__name__)
 
+# 日志分隔线（预先构造，避免每次转换重复拼接）
+_SEP = "=" * 70
+
+# 单次转换的开始/结束横幅（整段预先拼好，每个横幅只需一次日志调用）
+_START_BANNER = f"{_SEP}\n🔄 开始DITA转换...\n   类型: %s\n   标题: %s\n{_SEP}"
+_END_BANNER = (
+    f"\n{_SEP}\n✅ DITA转换完成\n   状态: %s\n   迭代次数: %d\n"
+    f"   错误数: %d\n   警告数: %d\n{_SEP}"
+)
+_TOTAL_STEPS = 5
+
+def _log_step(level: int, step_num: int, name: str):
+    """输出步骤标题（单次日志调用）"""
+    logger.log(level, "\n[Step %d/%d] %s", step_num, _TOTAL_STEPS, name)
+
+# 文件名中的非法字符：\W 即非 str.isalnum() 的字符（下划线替换后不变），
+# 与逐字符判断等价，中文等Unicode字母数字保留
+_UNSAFE_FILENAME_RE = re.compile(r'\W')
+
+# ===== 结构修复：错误关键字 + 内容类型 → 修复动作（原地修改数据） =====
+_FIX_PATTERN = re.compile(r'(缺少必需元素|缺少必需字段|steps数量不足)')
+
+def _fix_task_missing(data: Dict):
+    """Task：确保有steps，且每个step有cmd"""
+    if 'steps' not in data or not data['steps']:
+        data['steps'] = [{'cmd': 'Complete the task'}]
+    
+    for step in data.get('steps', []):
+        if 'cmd' not in step:
+            step['cmd'] = 'Perform action'
+
+def _fix_task_no_steps(data: Dict):
+    """Task：steps为空时补一个步骤"""
+    if len(data.get('steps', [])) == 0:
+        data['steps'] = [{'cmd': 'Complete the task'}]
+
+def _fix_concept_missing(data: Dict):
+    """Concept：确保有introduction或sections"""
+    if not data.get('introduction') and not data.get('sections'):
+        data['introduction'] = 'This is a concept description.'
+
+def _fix_reference_missing(data: Dict):
+    """Reference：确保有内容"""
+    if not (data.get('properties') or data.get('table') or data.get('sections')):
+        data['sections'] = [{'content': 'Reference information'}]
+
+_FIX_HANDLERS = {
+    ('Task', '缺少必需元素'): _fix_task_missing,
+    ('Task', '缺少必需字段'): _fix_task_missing,
+    ('Task', 'steps数量不足'): _fix_task_no_steps,
+    ('Concept', '缺少必需元素'): _fix_concept_missing,
+    ('Concept', '缺少必需字段'): _fix_concept_missing,
+    ('Reference', '缺少必需元素'): _fix_reference_missing,
+    ('Reference', '缺少必需字段'): _fix_reference_missing,
+}
+
 class DITAConverter:
     """DITA转换器 - Layer 3 主控制器"""
     
@@ -36,15 +94,33 @@ class DITAConverter:
         """
         logger.info("🚀 初始化DITA转换器...")
         
+        # 组件模块在首次实例化时才导入（content_structurer会引入openai），
+        # 只需要异常类或报告功能的调用方不必付出这部分导入开销
+        from .template_selector import TemplateSelector
+        from .constraint_engine import ConstraintEngine
+        from .template_renderer import TemplateRenderer
+        from .xml_validator import XMLValidator
+        
         self.use_ai = use_ai
         self.max_fix_iterations = max_fix_iterations
         self.templates_dir = templates_dir
         
-        # 初始化各组件（除了content_structurer，它会在每次转换时重新创建）
+        # 初始化各组件（content_structurer在首次转换时创建，之后每次转换前重置ID记录）
         self.template_selector = TemplateSelector(templates_dir)
         self.constraint_engine = ConstraintEngine()
         self.template_renderer = TemplateRenderer(templates_dir)
         self.xml_validator = XMLValidator()
+        self.content_structurer: Optional['ContentStructurer'] = None
+        
+        # 并行批量转换用的额外转换器（与self一起组成转换器池，跨convert_batch调用复用）
+        self._worker_converters: List['DITAConverter'] = []
+        
+        # 内容类型 → 渲染方法（预先绑定，渲染时只需一次字典查找）
+        self._renderers = {
+            'Task': self.template_renderer.render_task,
+            'Concept': self.template_renderer.render_concept,
+            'Reference': self.template_renderer.render_reference,
+        }
         
         logger.info("✅ DITA转换器初始化完成")
     
@@ -53,7 +129,10 @@ class DITAConverter:
         content: str,
         title: str,
         content_type: str,
-        metadata: Optional[Dict] = None
+        metadata: Optional[Dict] = None,
+        keep_structured: bool = True,
+        verbose: bool = True,
+        timestamp: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         转换内容为DITA XML
@@ -63,15 +142,15 @@ class DITAConverter:
             title: 标题
             content_type: 内容类型 (Task/Concept/Reference)
             metadata: 附加元数据
+            keep_structured: 是否在结果中保留structured_data（为False时渲染后即释放）
+            verbose: 为False时横幅和步骤进度降为DEBUG级别（批量转换时使用）
+            timestamp: 元数据时间戳（ISO格式，默认取当前时间；批量转换时共用批次开始时间）
             
         Returns:
             转换结果字典
         """
-        logger.info("="*70)
-        logger.info("🔄 开始DITA转换...")
-        logger.info(f"   类型: {content_type}")
-        logger.info(f"   标题: {title}")
-        logger.info("="*70)
+        log_level = logging.INFO if verbose else logging.DEBUG
+        logger.log(log_level, _START_BANNER, content_type, title)
         
         result = {
             'success': False,
@@ -83,7 +162,7 @@ class DITAConverter:
             'errors': [],
             'warnings': [],
             'metadata': {
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': timestamp or datetime.now().isoformat(),
                 'use_ai': self.use_ai,
                 'iterations': 0
             }
@@ -94,11 +173,11 @@ class DITAConverter:
         
         try:
             # Step 1: 模板选择
-            logger.info("\n[Step 1/5] 选择模板...")
+            _log_step(log_level, 1, "选择模板...")
             try:
                 template_info = self._step1_select_template(content_type)
                 result['metadata']['template'] = template_info
-                logger.info(f"   ✓ 选择: {template_info['template_file']}")
+                logger.log(log_level, "   ✓ 选择: %s", template_info['template_file'])
             except Exception as e:
                 error_handler.add_error(ConverterError(
                     f"模板选择失败: {str(e)}",
@@ -107,16 +186,16 @@ class DITAConverter:
                 raise
             
             # Step 2: 内容结构化
-            logger.info("\n[Step 2/5] 结构化内容...")
+            _log_step(log_level, 2, "结构化内容...")
             try:
                 structured_data = self._step2_structure_content(
                     content, title, content_type, metadata
                 )
                 result['structured_data'] = structured_data
-                logger.info(f"   ✓ 结构化完成")
+                logger.log(log_level, "   ✓ 结构化完成")
             except StructureError as e:
                 error_handler.add_error(e)
-                logger.warning(f"   ⚠️  结构化内容失败: {e}")
+                logger.warning("   ⚠️  结构化内容失败: %s", e)
                 raise
             except Exception as e:
                 error_handler.add_error(ConverterError(
@@ -126,13 +205,13 @@ class DITAConverter:
                 raise
             
             # Step 3: 约束验证
-            logger.info("\n[Step 3/5] 验证约束...")
+            _log_step(log_level, 3, "验证约束...")
             constraint_result = self._step3_validate_constraints(
                 structured_data, content_type
             )
             
             if not constraint_result['is_valid']:
-                logger.warning(f"   ⚠️  发现 {len(constraint_result['errors'])} 个约束错误")
+                logger.warning("   ⚠️  发现 %d 个约束错误", len(constraint_result['errors']))
                 # 将约束错误转换为标准化的警告
                 for err_msg in constraint_result['errors']:
                     error_handler.add_error(ConstraintError(
@@ -146,21 +225,26 @@ class DITAConverter:
                     structured_data, constraint_result['errors'], content_type
                 )
                 result['structured_data'] = structured_data
-                logger.info("   ✓ 已尝试修复结构")
+                logger.log(log_level, "   ✓ 已尝试修复结构")
             else:
-                logger.info("   ✓ 约束验证通过")
+                logger.log(log_level, "   ✓ 约束验证通过")
             
             # Step 4: 模板渲染
-            logger.info("\n[Step 4/5] 渲染模板...")
+            _log_step(log_level, 4, "渲染模板...")
             try:
                 dita_xml = self._step4_render_template(
                     structured_data, content_type
                 )
                 result['dita_xml'] = dita_xml
-                logger.info(f"   ✓ 渲染完成: {len(dita_xml)} 字符")
+                logger.log(log_level, "   ✓ 渲染完成: %d 字符", len(dita_xml))
+                
+                # 后续步骤只需要dita_xml，不保留时尽早释放结构化数据
+                if not keep_structured:
+                    structured_data = None
+                    result['structured_data'] = None
             except TemplateError as e:
                 error_handler.add_error(e)
-                logger.error(f"   ❌ 模板渲染失败: {e}")
+                logger.error("   ❌ 模板渲染失败: %s", e)
                 raise
             except Exception as e:
                 error_handler.add_error(ConverterError(
@@ -170,7 +254,7 @@ class DITAConverter:
                 raise
             
             # Step 5: XML验证 + 修复循环
-            logger.info("\n[Step 5/5] XML验证...")
+            _log_step(log_level, 5, "XML验证...")
             validation_result, final_xml = self._step5_validate_and_fix(dita_xml)
             
             result['validation'] = validation_result
@@ -179,9 +263,9 @@ class DITAConverter:
             
             if validation_result['is_valid']:
                 result['success'] = True
-                logger.info("   ✓ XML验证通过")
+                logger.log(log_level, "   ✓ XML验证通过")
             else:
-                logger.warning(f"   ⚠️  XML验证失败: {len(validation_result['errors'])} 个错误")
+                logger.warning("   ⚠️  XML验证失败: %d 个错误", len(validation_result['errors']))
                 # 将XML验证错误转换为标准化的错误
                 for err in validation_result['errors']:
                     error_handler.add_error(DITAConversionError(
@@ -190,28 +274,29 @@ class DITAConverter:
                         "XMLValidator"
                     ))
             
-            # 汇总统计
-            logger.info("\n" + "="*70)
-            logger.info("✅ DITA转换完成")
-            logger.info(f"   状态: {'成功' if result['success'] else '失败'}")
-            logger.info(f"   迭代次数: {result['metadata']['iterations']}")
-            logger.info(f"   错误数: {error_handler.get_results()['error_count']}")
-            logger.info(f"   警告数: {error_handler.get_results()['warning_count']}")
-            logger.info("="*70)
+            # 汇总统计（只需计数，不必序列化错误）
+            logger.log(
+                log_level, _END_BANNER,
+                '成功' if result['success'] else '失败',
+                result['metadata']['iterations'],
+                len(error_handler.errors),
+                len(error_handler.warnings)
+            )
             
         except Exception as e:
-            if not error_handler.get_results()['has_errors']:
+            if not error_handler.errors:
                 # 如果错误处理器中没有错误，添加一个通用错误
-                logger.error(f"❌ 转换过程出错: {e}", exc_info=True)
+                logger.error("❌ 转换过程出错: %s", e, exc_info=True)
                 error_handler.add_error(ConverterError(
                     f"转换过程出错: {str(e)}",
                     "GENERAL_CONVERSION_ERROR"
                 ))
             raise
         finally:
-            # 收集错误和警告
-            result['errors'] = [err['message'] for err in error_handler.get_results()['errors']]
-            result['warnings'] = [warn['message'] for warn in error_handler.get_results()['warnings']]
+            # 收集错误和警告（只在此处序列化一次）
+            stats = error_handler.get_results()
+            result['errors'] = [err['message'] for err in stats['errors']]
+            result['warnings'] = [warn['message'] for warn in stats['warnings']]
         
         return result
     
@@ -227,9 +312,15 @@ class DITAConverter:
         metadata: Optional[Dict]
     ) -> Dict:
         """Step 2: 内容结构化"""
-        # 每次结构化时创建新的ContentStructurer实例，确保ID唯一性
-        content_structurer = ContentStructurer(self.use_ai)
-        return content_structurer.structure_content(
+        # 复用ContentStructurer（避免每次重建AI客户端），转换前清空已用ID，
+        # 与每次新建实例的ID生成结果一致
+        if self.content_structurer is None:
+            from .content_structurer import ContentStructurer
+            self.content_structurer = ContentStructurer(self.use_ai)
+        else:
+            self.content_structurer.reset()
+        
+        return self.content_structurer.structure_content(
             content, title, content_type, metadata
         )
     
@@ -249,14 +340,10 @@ class DITAConverter:
         content_type: str
     ) -> str:
         """Step 4: 模板渲染"""
-        if content_type == 'Task':
-            return self.template_renderer.render_task(structured_data)
-        elif content_type == 'Concept':
-            return self.template_renderer.render_concept(structured_data)
-        elif content_type == 'Reference':
-            return self.template_renderer.render_reference(structured_data)
-        else:
+        renderer = self._renderers.get(content_type)
+        if renderer is None:
             raise ValueError(f"不支持的内容类型: {content_type}")
+        return renderer(structured_data)
     
     def _step5_validate_and_fix(self, dita_xml: str) -> tuple:
         """
@@ -276,9 +363,13 @@ class DITAConverter:
             if validation_result['is_valid']:
                 return validation_result, current_xml
             
+            # 没有可自动修复的错误时不再调用try_fix，直接结束
+            if not self.xml_validator.is_fixable(validation_result['errors']):
+                break
+            
             # 尝试自动修复
             if iteration < self.max_fix_iterations - 1:
-                logger.info(f"   ⚙️  尝试修复 (迭代 {iteration + 1})...")
+                logger.info("   ⚙️  尝试修复 (迭代 %d)...", iteration + 1)
                 
                 fixed_xml = self.xml_validator.try_fix(
                     current_xml,
@@ -314,81 +405,114 @@ class DITAConverter:
         Returns:
             修复后的结构化数据
         """
-        fixed_data = structured_data.copy()
-        
-        # 根据错误类型进行修复
+        # 每条错误做一次正则扫描，命中的修复动作各执行一次（修复动作是幂等的）
+        actions = {}  # 按首次命中顺序去重
         for error in errors:
             error_msg = error if isinstance(error, str) else error.get('message', '')
-            
-            # 修复缺失的必需字段
-            if "缺少必需元素" in error_msg or "缺少必需字段" in error_msg:
-                if content_type == 'Task':
-                    # 确保有steps
-                    if 'steps' not in fixed_data or not fixed_data['steps']:
-                        fixed_data['steps'] = [{'cmd': 'Complete the task'}]
-                    
-                    # 确保每个step有cmd
-                    for step in fixed_data.get('steps', []):
-                        if 'cmd' not in step:
-                            step['cmd'] = 'Perform action'
-                
-                elif content_type == 'Concept':
-                    # 确保有introduction或sections
-                    if not fixed_data.get('introduction') and not fixed_data.get('sections'):
-                        fixed_data['introduction'] = 'This is a concept description.'
-                
-                elif content_type == 'Reference':
-                    # 确保有内容
-                    if not any([fixed_data.get('properties'), fixed_data.get('table'), fixed_data.get('sections')]):
-                        fixed_data['sections'] = [{'content': 'Reference information'}]
-            
-            # 修复steps数量不足
-            elif "steps数量不足" in error_msg:
-                if content_type == 'Task' and len(fixed_data.get('steps', [])) == 0:
-                    fixed_data['steps'] = [{'command': 'Complete the task'}]
+            match = _FIX_PATTERN.search(error_msg)
+            if match:
+                handler = _FIX_HANDLERS.get((content_type, match.group(1)))
+                if handler is not None:
+                    actions[handler] = None
+        
+        if not actions:
+            return structured_data
+        
+        fixed_data = structured_data.copy()
+        for handler in actions:
+            handler(fixed_data)
         
         return fixed_data
     
     def convert_batch(
         self,
         chunks: List[Dict],
-        output_dir: Optional[Path] = None
+        output_dir: Optional[Path] = None,
+        max_workers: Optional[int] = None,
+        verbose: bool = True,
+        keep_structured: bool = False
     ) -> Dict[str, Any]:
         """
         批量转换
         
+        各块的转换互相独立，使用线程池并发执行（LLM调用为I/O密集型，
+        lxml解析期间释放GIL）。结果按输入顺序取回，转换成功的块随即交给
+        单个后台写入线程保存，文件I/O与后续块的转换重叠。
+        
         Args:
             chunks: 分块列表，每个包含 content, title, type
             output_dir: 输出目录（可选）
+            max_workers: 最大并发数（默认CPU核数，1为串行）。并行时self负责其中一个线程，
+                其余线程使用按相同参数创建的转换器（保存在实例上复用）
+            verbose: 是否以INFO级别输出每个块的进度和横幅（为False时降为DEBUG，大批量时可关闭）
+            keep_structured: 是否在各块结果中保留structured_data（默认不保留，降低批量内存占用）
             
         Returns:
             批量转换结果
         """
-        logger.info("="*70)
-        logger.info(f"🔄 批量转换: {len(chunks)} 个块")
-        logger.info("="*70)
+        logger.info(_SEP)
+        logger.info("🔄 批量转换: %d 个块", len(chunks))
+        logger.info(_SEP)
         
-        results = []
-        success_count = 0
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        max_workers = max(1, min(max_workers, len(chunks)))
+        
+        # 同一批次的块共用批次开始时间，只格式化一次
+        batch_timestamp = datetime.now().isoformat()
         
-        for i, chunk in enumerate(chunks, 1):
-            logger.info(f"\n[{i}/{len(chunks)}] 处理: {chunk.get('title', 'Untitled')}")
+        def iter_results():
+            """按输入顺序逐个产出转换结果"""
+            if max_workers == 1:
+                for i, chunk in enumerate(chunks, 1):
+                    yield self._convert_chunk(
+                        chunk, i, len(chunks), verbose, keep_structured, batch_timestamp
+                    )
+                return
             
-            result = self.convert(
-                content=chunk['content'],
-                title=chunk['title'],
-                content_type=chunk['type'],
-                metadata=chunk.get('metadata')
-            )
+            # lxml解析器等组件不能跨线程共享：每个任务从池中取一个空闲转换器，
+            # 用完放回（池大小等于线程数，取用时不会阻塞）
+            pool = queue.SimpleQueue()
+            for converter in self._get_converters(max_workers):
+                pool.put(converter)
             
-            results.append(result)
+            def convert_in_thread(indexed_chunk):
+                i, chunk = indexed_chunk
+                converter = pool.get()
+                try:
+                    return converter._convert_chunk(
+                        chunk, i, len(chunks), verbose, keep_structured, batch_timestamp
+                    )
+                finally:
+                    pool.put(converter)
             
-            if result['success']:
-                success_count += 1
-                
-                # 保存到文件
-                if output_dir:
-                    self._save_dita_file(result, output_dir, i)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                yield from executor.map(convert_in_thread, enumerate(chunks, 1))
+        
+        # 输出目录只创建一次，逐个保存时不再重复mkdir
+        if output_dir:
+            output_dir = Path(output_dir)
+            output_dir.mkdir(parents=True, exist_ok=True)
+        
+        results = []
+        success_count = 0
+        # 单个写入线程：写文件不阻塞下一个块的转换，退出with时等待全部写完
+        with ThreadPoolExecutor(max_workers=1) as writer:
+            save_futures = []
+            for i, result in enumerate(iter_results(), 1):
+                results.append(result)
+                if result['success']:
+                    success_count += 1
+                    
+                    # 保存到文件
+                    if output_dir:
+                        save_futures.append(
+                            writer.submit(self._save_dita_file, result, output_dir, i)
+                        )
+            
+            # 传播写入过程中的异常
+            for future in save_futures:
+                future.result()
         
         # 生成批量报告
         batch_result = {
@@ -399,39 +523,76 @@ class DITAConverter:
             'results': results
         }
         
-        logger.info("\n" + "="*70)
-        logger.info("✅ 批量转换完成")
-        logger.info(f"   总数: {batch_result['total']}")
-        logger.info(f"   成功: {batch_result['success']}")
-        logger.info(f"   失败: {batch_result['failed']}")
-        logger.info(f"   成功率: {batch_result['success_rate']:.1%}")
-        logger.info("="*70)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("\n%s", _SEP)
+            logger.info("✅ 批量转换完成")
+            logger.info("   总数: %d", batch_result['total'])
+            logger.info("   成功: %d", batch_result['success'])
+            logger.info("   失败: %d", batch_result['failed'])
+            logger.info("   成功率: %.1f%%", batch_result['success_rate'] * 100)
+            logger.info(_SEP)
         
         return batch_result
     
+    def _get_converters(self, count: int) -> List['DITAConverter']:
+        """
+        获取count个转换器用于并行转换
+        
+        self为第一个；其余按与self相同的参数创建，保存在实例上供后续批次复用
+        """
+        workers = self._worker_converters
+        while len(workers) < count - 1:
+            workers.append(DITAConverter(
+                use_ai=self.use_ai,
+                templates_dir=self.templates_dir,
+                max_fix_iterations=self.max_fix_iterations
+            ))
+        return [self] + workers[:count - 1]
+    
+    def _convert_chunk(
+        self,
+        chunk: Dict,
+        index: int,
+        total: int,
+        verbose: bool = True,
+        keep_structured: bool = True,
+        timestamp: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """转换批量中的单个块"""
+        if verbose:
+            logger.info("\n[%d/%d] 处理: %s", index, total, chunk.get('title', 'Untitled'))
+        
+        return self.convert(
+            content=chunk['content'],
+            title=chunk['title'],
+            content_type=chunk['type'],
+            metadata=chunk.get('metadata'),
+            keep_structured=keep_structured,
+            verbose=verbose,
+            timestamp=timestamp
+        )
+    
     def _save_dita_file(
         self,
         result: Dict,
         output_dir: Path,
         index: int
     ):
-        """保存DITA文件"""
-        output_dir = Path(output_dir)
-        output_dir.mkdir(parents=True, exist_ok=True)
-        
+        """保存DITA文件（output_dir须为已创建的Path，由convert_batch预先准备）"""
         # 生成文件名
         title = result['title']
         content_type = result['content_type'].lower()
-        safe_title = "".join(c if c.isalnum() else '_' for c in title)[:50]
+        safe_title = _UNSAFE_FILENAME_RE.sub('_', title[:50])
         
         filename = f"{index:03d}_{content_type}_{safe_title}.dita"
         filepath = output_dir / filename
         
-        # 保存XML
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(result['dita_xml'])
+        # 一次性编码为UTF-8后以二进制写入，绕过文本层的增量编码
+        data = result['dita_xml'].encode('utf-8')
+        with open(filepath, 'wb') as f:
+            f.write(data)
         
-        logger.info(f"   💾 已保存: {filepath.name}")
+        logger.info("   💾 已保存: %s", filepath.name)
     
     def save_conversion_report(
         self,
@@ -449,16 +610,15 @@ class DITAConverter:
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
         # 准备报告数据（移除XML内容以减小文件大小）
-        report = result.copy()
-        if 'dita_xml' in report:
-            report['dita_xml_length'] = len(report['dita_xml'])
-            report['dita_xml_preview'] = report['dita_xml'][:500] + '...'
-            del report['dita_xml']
+        report = {k: v for k, v in result.items() if k != 'dita_xml'}
+        if 'dita_xml' in result:
+            dita_xml = result['dita_xml']
+            report['dita_xml_length'] = len(dita_xml)
+            report['dita_xml_preview'] = dita_xml[:500] + '...'
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(report, f, indent=2, ensure_ascii=False)
+        json_utils.dump(report, output_path)
         
-        logger.info(f"📊 转换报告已保存: {output_path}")
+        logger.info("📊 转换报告已保存: %s", output_path)
 
 
 # 测试代码
@@ -8,7 +8,12 @@ from typing import Optional, Dict, Any
 class DITAConversionError(Exception):
     """
     DITA转换过程中的统一异常类
+    
+    使用__slots__存放错误字段：BaseException自带的__dict__保持为空，
+    大批量转换累积大量错误/警告时显著减少单个实例的内存占用
     """
+    __slots__ = ('message', 'error_code', 'component', 'details', 'is_warning')
+    
     def __init__(
         self,
         message: str,
@@ -34,6 +39,14 @@ class DITAConversionError(Exception):
         self.details = details or {}
         self.is_warning = is_warning
         
+    def __reduce__(self):
+        """
+        支持pickle/copy：BaseException默认只保存args和__dict__，会丢失__slots__字段；
+        这里直接恢复全部字段，不经过各子类不同签名的__init__
+        """
+        fields = tuple(getattr(self, name) for name in DITAConversionError.__slots__)
+        return _restore_error, (type(self), self.args, fields), getattr(self, '__dict__', None) or None
+    
     def to_dict(self) -> Dict[str, Any]:
         """
         转换为字典格式
@@ -60,10 +73,20 @@ class DITAConversionError(Exception):
         return f"{prefix} [{self.error_code}] ({self.component}): {self.message}"
 
 
+def _restore_error(cls: type, args: tuple, fields: tuple) -> DITAConversionError:
+    """按__reduce__保存的args和字段重建异常实例（pickle/copy使用）"""
+    error = cls.__new__(cls, *args)
+    for name, value in zip(DITAConversionError.__slots__, fields):
+        setattr(error, name, value)
+    return error
+
+
 class TemplateError(DITAConversionError):
     """
     模板相关错误
     """
+    __slots__ = ()
+    
     def __init__(self,
                  message: str,
                  error_code: str = "TEMPLATE_ERROR",
@@ -76,6 +99,8 @@ class StructureError(DITAConversionError):
     """
     内容结构相关错误
     """
+    __slots__ = ()
+    
     def __init__(self,
                  message: str,
                  error_code: str = "STRUCTURE_ERROR",
@@ -88,6 +113,8 @@ class ConstraintError(DITAConversionError):
     """
     约束验证相关错误
     """
+    __slots__ = ()
+    
     def __init__(self,
                  message: str,
                  error_code: str = "CONSTRAINT_ERROR",
@@ -100,6 +127,8 @@ class XMLValidationError(DITAConversionError):
     """
     XML验证相关错误
     """
+    __slots__ = ()
+    
     def __init__(self,
                  message: str,
                  error_code: str = "XML_VALIDATION_ERROR",
@@ -112,6 +141,8 @@ class ConverterError(DITAConversionError):
     """
     转换器主流程错误
     """
+    __slots__ = ()
+    
     def __init__(self,
                  message: str,
                  error_code: str = "CONVERTER_ERROR",
@@ -164,7 +195,7 @@ class ErrorHandler:
         获取错误处理结果
         
         Returns:
-            包含错误、警告和统计信息的字典
+            包含错误、警告和统计信息的字典（每次调用新建）
         """
         return {
             "errors": [err.to_dict() for err in self.errors],
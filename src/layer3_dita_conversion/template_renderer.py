@@ -3,15 +3,72 @@ Step 4: 模板渲染器
 使用Jinja2将结构化数据填充到DITA模板
 """
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
+from functools import lru_cache
 import logging
-from jinja2 import Environment, FileSystemLoader, Template, TemplateError
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, Template, TemplateError
 import re
 
 from .errors import TemplateError, DITAConversionError
 
 logger = logging.getLogger(__name__)
 
+# XML特殊字符转义表（'&'必须最先替换，避免二次转义已生成的实体）
+_XML_ESCAPES = (
+    ('&', '&amp;'),
+    ('<', '&lt;'),
+    ('>', '&gt;'),
+    ('"', '&quot;'),
+    ("'", '&apos;')
+)
+
+# 预编译正则（ID格式化）
+_ID_STRIP_RE = re.compile(r'[^a-z0-9\s_-]')
+_ID_WS_RE = re.compile(r'\s+')
+
+# 转义/ID格式化结果缓存容量（条目数）
+_TEXT_CACHE_SIZE = 4096
+# 只缓存不超过该长度的字符串：标题、命令、ID等短文本在批量文档中反复出现，长正文很少重复
+_ESCAPE_CACHE_MAX_LEN = 256
+
+def _replace_xml_chars(text: str) -> str:
+    """替换XML特殊字符（只对出现的字符执行替换）"""
+    for char, escape in _XML_ESCAPES:
+        if char in text:
+            text = text.replace(char, escape)
+    return text
+
+_replace_xml_chars_cached = lru_cache(maxsize=_TEXT_CACHE_SIZE)(_replace_xml_chars)
+
+@lru_cache(maxsize=_TEXT_CACHE_SIZE)
+def _make_id(text: str) -> str:
+    """
+    将文本格式化为符合DITA规范的ID（纯函数，按文本缓存）
+    
+    Args:
+        text: 原始文本
+        
+    Returns:
+        格式化后的ID
+    """
+    # 转小写
+    id_str = text.lower()
+    
+    # 移除特殊字符
+    id_str = _ID_STRIP_RE.sub('', id_str)
+    
+    # 空格替换为下划线
+    id_str = _ID_WS_RE.sub('_', id_str)
+    
+    # 移除首尾下划线
+    id_str = id_str.strip('_')
+    
+    # 确保以字母开头
+    if id_str and not id_str[0].isalpha():
+        id_str = 'id_' + id_str
+    
+    return id_str or 'unnamed'
+
 class TemplateRenderer:
     """DITA模板渲染器"""
     
@@ -27,18 +84,39 @@ class TemplateRenderer:
         
         self.templates_dir = templates_dir
         
+        # 模板字节码缓存到磁盘，新进程无需重新编译模板（按模板源码校验和失效）。
+        # 不指定目录时Jinja使用按用户隔离的临时目录（权限0700并校验属主），
+        # 其他用户无法放入被反序列化执行的缓存文件
+        
         # 初始化Jinja2环境
         self.env = Environment(
             loader=FileSystemLoader(str(templates_dir)),
             trim_blocks=True,
             lstrip_blocks=True,
-            autoescape=False  # XML需要手动控制转义
+            autoescape=False,  # XML需要手动控制转义
+            auto_reload=False,
+            bytecode_cache=FileSystemBytecodeCache(pattern='%s.cache')
         )
         
         # 添加自定义过滤器
         self.env.filters['escape_xml'] = self._escape_xml
         self.env.filters['format_id'] = self._format_id
         
+        # 输出时转义的环境：每个{{ }}表达式输出前经finalize转义，只处理模板实际输出的值，
+        # 不再预先遍历整份数据。finalize会编译进模板代码，字节码缓存与self.env分开存放
+        self._escaping_env = self.env.overlay(
+            finalize=self._finalize_escape,
+            bytecode_cache=FileSystemBytecodeCache(pattern='%s.escaped.cache')
+        )
+        
+        # 已编译模板缓存：(模板名, 是否转义) → Template（渲染时不再查找和检查模板文件）
+        self._template_cache: Dict[Tuple[str, bool], Template] = {}
+        
+        # 三种主题模板在初始化时绑定（开启转义），render_task等直接渲染，不再按名称查找
+        self._task_template = self._get_template('task.xml.j2')
+        self._concept_template = self._get_template('concept.xml.j2')
+        self._reference_template = self._get_template('reference.xml.j2')
+        
         logger.info(f"✅ 模板渲染器初始化完成: {templates_dir}")
     
     def render(
@@ -53,28 +131,28 @@ class TemplateRenderer:
         Args:
             template_name: 模板文件名
             data: 数据字典
-            auto_escape: 是否自动转义XML特殊字符
+            auto_escape: 是否自动转义XML特殊字符（在输出各表达式时转义）
             
         Returns:
             渲染后的XML字符串
         """
-        logger.info(f"🎨 渲染模板: {template_name}")
+        # 加载模板
+        template = self._get_template(template_name, auto_escape)
+        
+        return self._render_template(template, template_name, data)
+    
+    def _render_template(self, template: Template, template_name: str, data: Dict[str, Any]) -> str:
+        """渲染已编译的模板并后处理"""
+        logger.info("🎨 渲染模板: %s", template_name)
         
         try:
-            # 加载模板
-            template = self.env.get_template(template_name)
-            
-            # 预处理数据（自动转义）
-            if auto_escape:
-                data = self._escape_data(data)
-            
             # 渲染
             xml_content = template.render(**data)
             
             # 后处理
             xml_content = self._post_process(xml_content)
             
-            logger.info(f"✅ 模板渲染完成: {len(xml_content)} 字符")
+            logger.info("✅ 模板渲染完成: %d 字符", len(xml_content))
             
             return xml_content
             
@@ -86,22 +164,35 @@ class TemplateRenderer:
                 details={"template_name": template_name, "error": str(e)}
             )
     
+    def _get_template(self, template_name: str, auto_escape: bool = True) -> Template:
+        """获取已编译的模板（首次使用时加载并编译）"""
+        key = (template_name, auto_escape)
+        template = self._template_cache.get(key)
+        if template is None:
+            env = self._escaping_env if auto_escape else self.env
+            template = env.get_template(template_name)
+            self._template_cache[key] = template
+        return template
+    
     def render_task(self, data: Dict) -> str:
         """渲染Task类型"""
-        return self.render('task.xml.j2', data)
+        return self._render_template(self._task_template, 'task.xml.j2', data)
     
     def render_concept(self, data: Dict) -> str:
         """渲染Concept类型"""
-        return self.render('concept.xml.j2', data)
+        return self._render_template(self._concept_template, 'concept.xml.j2', data)
     
     def render_reference(self, data: Dict) -> str:
         """渲染Reference类型"""
-        return self.render('reference.xml.j2', data)
+        return self._render_template(self._reference_template, 'reference.xml.j2', data)
     
     def _escape_data(self, data: Any) -> Any:
         """
         递归转义数据中的XML特殊字符
         
+        写时复制：子结构中没有需要转义的字符串时直接返回原对象，只为确实
+        发生变化的dict/list分配新容器，调用方的数据始终保持不变
+        
         Args:
             data: 原始数据
             
@@ -111,12 +202,39 @@ class TemplateRenderer:
         if isinstance(data, str):
             return self._escape_xml(data)
         elif isinstance(data, dict):
-            return {k: self._escape_data(v) for k, v in data.items()}
+            escaped = None
+            for k, v in data.items():
+                new_v = self._escape_data(v)
+                if new_v is not v:
+                    if escaped is None:
+                        escaped = dict(data)
+                    escaped[k] = new_v
+            return data if escaped is None else escaped
         elif isinstance(data, list):
-            return [self._escape_data(item) for item in data]
+            escaped = None
+            for i, item in enumerate(data):
+                new_item = self._escape_data(item)
+                if new_item is not item:
+                    if escaped is None:
+                        escaped = list(data)
+                    escaped[i] = new_item
+            return data if escaped is None else escaped
         else:
             return data
     
+    def _finalize_escape(self, value: Any) -> Any:
+        """
+        Jinja finalize回调：输出{{ }}表达式的值之前转义XML特殊字符
+        
+        字符串直接转义；dict/list按_escape_data转义其中的字符串，
+        与渲染前转义整份数据时的输出一致
+        """
+        if isinstance(value, str):
+            return self._escape_xml(value)
+        if isinstance(value, (dict, list)):
+            return self._escape_data(value)
+        return value
+    
     def _escape_xml(self, text: str) -> str:
         """
         转义XML特殊字符
@@ -130,18 +248,15 @@ class TemplateRenderer:
         if not isinstance(text, str):
             return text
         
-        replacements = {
-            '&': '&amp;',
-            '<': '&lt;',
-            '>': '&gt;',
-            '"': '&quot;',
-            "'": '&apos;'
-        }
-        
-        for char, escape in replacements.items():
-            text = text.replace(char, escape)
+        # 快速路径：大多数字段（ID、短文本）不含特殊字符，
+        # 一次组合判断（每个in都是C层扫描）后直接返回原字符串
+        if not ('&' in text or '<' in text or '>' in text or '"' in text or "'" in text):
+            return text
         
-        return text
+        # 短文本走缓存，重复出现时不再扫描替换
+        if len(text) <= _ESCAPE_CACHE_MAX_LEN:
+            return _replace_xml_chars_cached(text)
+        return _replace_xml_chars(text)
     
     def _format_id(self, text: str) -> str:
         """
@@ -153,27 +268,16 @@ class TemplateRenderer:
         Returns:
             格式化后的ID
         """
-        # 转小写
-        id_str = text.lower()
-        
-        # 移除特殊字符
-        id_str = re.sub(r'[^a-z0-9\s_-]', '', id_str)
-        
-        # 空格替换为下划线
-        id_str = re.sub(r'\s+', '_', id_str)
-        
-        # 移除首尾下划线
-        id_str = id_str.strip('_')
-        
-        # 确保以字母开头
-        if id_str and not id_str[0].isalpha():
-            id_str = 'id_' + id_str
-        
-        return id_str or 'unnamed'
+        # 字符串按文本缓存；其他类型不可哈希，直接计算（保持原有行为）
+        if isinstance(text, str):
+            return _make_id(text)
+        return _make_id.__wrapped__(text)
     
     def _post_process(self, xml_content: str) -> str:
         """
-        后处理XML内容
+        后处理XML内容：移除行尾空格，连续空行合并为一行
+        
+        单次遍历各行完成（首行和末行原样保留，只去行尾空格）
         
         Args:
             xml_content: 原始XML
@@ -181,20 +285,23 @@ class TemplateRenderer:
         Returns:
             处理后的XML
         """
-        # 移除多余的空行
-        xml_content = re.sub(r'\n\s*\n\s*\n', '\n\n', xml_content)
-        
-        # 确保XML声明在第一行
-        if not xml_content.startswith('<?xml'):
-            # 模板中已包含，这里不需要重复添加
-            pass
-        
-        # 移除行尾空格
         lines = xml_content.split('\n')
-        lines = [line.rstrip() for line in lines]
-        xml_content = '\n'.join(lines)
+        out = [lines[0].rstrip()]
+        blanks = 0
+        for line in lines[1:-1]:
+            line = line.rstrip()
+            if line:
+                blanks = 0
+            else:
+                # 移除多余的空行
+                blanks += 1
+                if blanks > 1:
+                    continue
+            out.append(line)
+        if len(lines) > 1:
+            out.append(lines[-1].rstrip())
         
-        return xml_content
+        return '\n'.join(out)
     
     def preview_template(self, template_name: str) -> str:
         """
@@ -36,13 +36,25 @@ class TemplateSelector:
         logger.info(f"✅ 模板选择器初始化完成: {self.templates_dir}")
     
     def _validate_templates(self):
-        """验证所有模板文件存在"""
+        """
+        验证所有模板文件存在
+        
+        每个模板只stat一次，缓存解析后的路径和文件大小（模板在运行期间视为静态，
+        之后的选择不再访问文件系统）
+        """
         missing_templates = []
+        self._resolved: Dict[str, Path] = {}
+        self._sizes: Dict[str, int] = {}
         
         for dita_type, template_file in self.template_map.items():
             template_path = self.templates_dir / template_file
-            if not template_path.exists():
+            try:
+                size = template_path.stat().st_size
+            except OSError:
                 missing_templates.append(template_file)
+                continue
+            self._resolved[dita_type] = template_path
+            self._sizes[dita_type] = size
         
         if missing_templates:
             logger.warning(f"⚠️  缺失模板文件: {missing_templates}")
@@ -69,13 +81,13 @@ class TemplateSelector:
                 f"支持的类型: {list(self.template_map.keys())}"
             )
         
-        template_file = self.template_map[content_type]
-        template_path = self.templates_dir / template_file
-        
-        if not template_path.exists():
-            raise FileNotFoundError(f"模板文件不存在: {template_path}")
+        template_path = self._resolved.get(content_type)
+        if template_path is None:
+            raise FileNotFoundError(
+                f"模板文件不存在: {self.templates_dir / self.template_map[content_type]}"
+            )
         
-        logger.info(f"📄 选择模板: {content_type} → {template_file}")
+        logger.info(f"📄 选择模板: {content_type} → {template_path.name}")
         
         return template_path
     
@@ -91,12 +103,13 @@ class TemplateSelector:
         """
         template_path = self.select_template(content_type)
         
+        # select_template成功即说明模板存在，大小取初始化时的缓存
         return {
             'type': content_type,
             'template_file': template_path.name,
             'template_path': str(template_path),
-            'exists': template_path.exists(),
-            'size': template_path.stat().st_size if template_path.exists() else 0
+            'exists': True,
+            'size': self._sizes[content_type]
         }
     
     def list_available_templates(self) -> Dict[str, str]:
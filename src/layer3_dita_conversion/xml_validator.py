@@ -2,7 +2,9 @@
 Step 5: XML验证器
 使用lxml进行XML良构性验证和基础检查
 """
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple, Union
+from collections import Counter
+import io
 import logging
 from lxml import etree
 import re
@@ -11,6 +13,41 @@ from .errors import ErrorHandler, XMLValidationError, DITAConversionError
 
 logger = logging.getLogger(__name__)
 
+# XML声明（允许前导空白）
+_XML_DECL_RE = re.compile(r'\s*<\?xml')
+_XML_DECL_BYTES_RE = re.compile(rb'\s*<\?xml')
+
+# 基本格式检查用到的标记：输入类型 → (声明正则, 声明开头, 换行, encoding, DOCTYPE)
+_BASIC_FORMAT_MARKERS = {
+    str: (_XML_DECL_RE, '<?xml', '\n', 'encoding', '<!DOCTYPE'),
+    bytes: (_XML_DECL_BYTES_RE, b'<?xml', b'\n', b'encoding', b'<!DOCTYPE')
+}
+
+# DITA ID规范：字母开头，只能包含字母、数字、下划线、连字符、点号
+_ID_PATTERN = re.compile(r'^[a-zA-Z][a-zA-Z0-9_\-\.]*$')
+# 所有元素的id属性值（文档顺序）；smart_strings=False返回普通str，不持有对树的引用
+_ALL_IDS = etree.XPath('//*/@id', smart_strings=False)
+# ID中不允许出现的字符（自动修复时替换为下划线）
+_INVALID_ID_CHARS = re.compile(r'[^a-zA-Z0-9_\-\.]')
+# 元素的id属性（单引号或双引号），自动修复时一次扫描替换全部非法ID
+_ID_ATTR_RE = re.compile(r'''(\sid=)(["'])(.*?)\2''')
+
+# 各DITA根元素的必需子元素（按检查顺序）
+_DITA_REQUIRED_CHILDREN = {
+    'task': ('title', 'taskbody'),
+    'concept': ('title', 'conbody'),
+    'reference': ('title', 'refbody')
+}
+
+# 允许为空的元素（不产生EmptyElement警告）
+_EMPTY_ALLOWED_TAGS = frozenset({'shortdesc', 'note', 'info', 'br', 'hr', 'img'})
+
+# 超过该大小（字节）的文档使用iterparse流式检查，不在内存中保留整棵树
+_STREAMING_THRESHOLD = 1024 * 1024
+
+# try_fix能够自动修复的错误类型
+_FIXABLE_ERROR_TYPES = frozenset({'MissingDeclaration', 'InvalidIDFormat'})
+
 class XMLValidator:
     """XML验证器 - 基于lxml的快速验证"""
     
@@ -24,12 +61,12 @@ class XMLValidator:
         
         logger.info("✅ XML验证器初始化完成")
     
-    def validate(self, xml_content: str) -> Dict[str, Any]:
+    def validate(self, xml_content: Union[str, bytes]) -> Dict[str, Any]:
         """
         验证XML
         
         Args:
-            xml_content: XML字符串
+            xml_content: XML字符串，或UTF-8编码的字节（如直接读取的文件内容，免去再次编码）
             
         Returns:
             验证结果字典
@@ -48,12 +85,17 @@ class XMLValidator:
         basic_check = self._check_basic_format(xml_content)
         result['warnings'].extend(basic_check['warnings'])
         
-        # Step 2: 解析XML
+        # Step 2: 解析XML（大文档流式解析，解析的同时完成Step 3、4的检查）
         try:
-            tree = etree.fromstring(xml_content.encode('utf-8'), self.parser)
+            data = xml_content if isinstance(xml_content, bytes) else xml_content.encode('utf-8')
+            if len(data) > _STREAMING_THRESHOLD:
+                tree = None
+                root_tag, content_check, dita_check = self._check_streaming(data)
+            else:
+                tree = etree.fromstring(data, self.parser)
+                root_tag = tree.tag
             result['is_wellformed'] = True
-            result['info']['root_element'] = tree.tag
-            result['info']['element_count'] = len(tree.xpath('//*'))
+            result['info']['root_element'] = root_tag
             
             logger.info("✓ XML格式良好")
             
@@ -75,13 +117,15 @@ class XMLValidator:
             logger.error(f"❌ 未知错误: {e}")
             return result
         
-        # Step 3: 内容验证
-        content_check = self._check_content(tree)
+        if tree is not None:
+            # Step 3: 内容验证（同一次遍历中统计元素数）
+            content_check = self._check_content(tree)
+            # Step 4: DITA特定检查
+            dita_check = self._check_dita_specifics(tree)
+        
+        result['info']['element_count'] = content_check['element_count']
         result['errors'].extend(content_check['errors'])
         result['warnings'].extend(content_check['warnings'])
-        
-        # Step 4: DITA特定检查
-        dita_check = self._check_dita_specifics(tree)
         result['errors'].extend(dita_check['errors'])
         result['warnings'].extend(dita_check['warnings'])
         
@@ -95,12 +139,15 @@ class XMLValidator:
         
         return result
     
-    def _check_basic_format(self, xml_content: str) -> Dict:
-        """检查基本格式"""
+    def _check_basic_format(self, xml_content: Union[str, bytes]) -> Dict:
+        """检查基本格式（str和bytes输入直接检查，不做编解码）"""
         warnings = []
+        decl_re, decl, newline, encoding, doctype = _BASIC_FORMAT_MARKERS[
+            bytes if isinstance(xml_content, bytes) else str
+        ]
         
-        # 检查XML声明
-        if not xml_content.strip().startswith('<?xml'):
+        # 检查XML声明（match从开头匹配，不复制整篇文档）
+        if not decl_re.match(xml_content):
             warnings.append({
                 'type': 'MissingDeclaration',
                 'message': '缺少XML声明',
@@ -108,7 +155,7 @@ class XMLValidator:
             })
         
         # 检查编码声明
-        if '<?xml' in xml_content and 'encoding' not in xml_content.split('\n')[0]:
+        if decl in xml_content and encoding not in xml_content.partition(newline)[0]:
             warnings.append({
                 'type': 'MissingEncoding',
                 'message': 'XML声明缺少encoding属性',
@@ -116,7 +163,7 @@ class XMLValidator:
             })
         
         # 检查DOCTYPE
-        if '<!DOCTYPE' not in xml_content:
+        if doctype not in xml_content:
             warnings.append({
                 'type': 'MissingDoctype',
                 'message': '缺少DOCTYPE声明',
@@ -126,35 +173,40 @@ class XMLValidator:
         return {'warnings': warnings}
     
     def _check_content(self, tree: etree._Element) -> Dict:
-        """检查内容规范"""
+        """
+        检查内容规范
+        
+        单次遍历树检查空元素并统计元素数；ID由预编译XPath一次取出后统计次数、校验格式
+        """
         errors = []
         warnings = []
+        element_count = 0
         
-        # 检查空元素
         for elem in tree.iter():
-            # 跳过允许为空的元素
-            if elem.tag in ['shortdesc', 'note', 'info']:
-                continue
+            tag = elem.tag
             
-            # 检查是否完全为空（无文本、无子元素、无尾部文本）
-            if (not elem.text or not elem.text.strip()) and \
+            # 检查是否完全为空（无文本、无子元素、无尾部文本），跳过允许为空的元素
+            if tag not in _EMPTY_ALLOWED_TAGS and \
+               (not elem.text or not elem.text.strip()) and \
                len(elem) == 0 and \
                (not elem.tail or not elem.tail.strip()):
-                
-                # 某些元素允许为空
-                if elem.tag not in ['br', 'hr', 'img']:
-                    warnings.append({
-                        'type': 'EmptyElement',
-                        'message': f'元素 <{elem.tag}> 为空',
-                        'element': elem.tag
-                    })
-        
-        # 检查ID唯一性
-        id_counts = {}
-        for elem in tree.xpath('//*[@id]'):
-            elem_id = elem.get('id')
-            id_counts[elem_id] = id_counts.get(elem_id, 0) + 1
+                warnings.append(self._empty_element_warning(tag))
+            
+            # 注释、处理指令等节点的tag不是字符串，不计入元素
+            if isinstance(tag, str):
+                element_count += 1
+        
+        # 一次XPath调用直接取出所有id属性字符串（文档顺序）
+        errors = self._check_ids(_ALL_IDS(tree))
+        
+        return {'errors': errors, 'warnings': warnings, 'element_count': element_count}
+    
+    def _check_ids(self, ids: List[str]) -> List[Dict]:
+        """检查ID唯一性和格式（ids按文档顺序排列）"""
+        errors = []
+        id_counts = Counter(ids)
         
+        # 检查ID唯一性（重复ID错误排在格式错误之前）
         for elem_id, count in id_counts.items():
             if count > 1:
                 errors.append({
@@ -163,11 +215,9 @@ class XMLValidator:
                     'id': elem_id
                 })
         
-        # 检查ID格式
-        id_pattern = re.compile(r'^[a-zA-Z][a-zA-Z0-9_\-\.]*$')
-        for elem in tree.xpath('//*[@id]'):
-            elem_id = elem.get('id')
-            if not id_pattern.match(elem_id):
+        # 检查ID格式（按出现次数逐个报告）
+        for elem_id in ids:
+            if not _ID_PATTERN.match(elem_id):
                 errors.append({
                     'type': 'InvalidIDFormat',
                     'message': f'ID "{elem_id}" 格式不符合规范',
@@ -175,118 +225,216 @@ class XMLValidator:
                     'suggestion': 'ID必须以字母开头，只能包含字母、数字、下划线、连字符、点号'
                 })
         
-        return {'errors': errors, 'warnings': warnings}
+        return errors
+    
+    def _empty_element_warning(self, tag: Any) -> Dict:
+        """构造空元素警告"""
+        return {
+            'type': 'EmptyElement',
+            'message': f'元素 <{tag}> 为空',
+            'element': tag
+        }
     
     def _check_dita_specifics(self, tree: etree._Element) -> Dict:
-        """检查DITA特定规则"""
+        """
+        检查DITA特定规则
+        
+        按根元素查表检查必需子元素（每个要求一次find），Task再检查steps结构
+        """
         errors = []
         warnings = []
         
         root_tag = tree.tag
         
+        # 检查必需元素
+        children = {}
+        for child_tag in _DITA_REQUIRED_CHILDREN.get(root_tag, ()):
+            child = tree.find(child_tag)
+            if child is None:
+                errors.append({
+                    'type': 'MissingRequiredElement',
+                    'message': f'<{root_tag}> 缺少必需的 <{child_tag}> 元素'
+                })
+            children[child_tag] = child
+        
         # Task特定检查
-        if root_tag == 'task':
-            task_check = self._check_task_structure(tree)
-            errors.extend(task_check['errors'])
-            warnings.extend(task_check['warnings'])
-        
-        # Concept特定检查
-        elif root_tag == 'concept':
-            concept_check = self._check_concept_structure(tree)
-            errors.extend(concept_check['errors'])
-            warnings.extend(concept_check['warnings'])
-        
-        # Reference特定检查
-        elif root_tag == 'reference':
-            reference_check = self._check_reference_structure(tree)
-            errors.extend(reference_check['errors'])
-            warnings.extend(reference_check['warnings'])
+        taskbody = children.get('taskbody')
+        if taskbody is not None:
+            errors.extend(self._check_task_steps(taskbody))
         
         return {'errors': errors, 'warnings': warnings}
     
-    def _check_task_structure(self, tree: etree._Element) -> Dict:
-        """检查Task结构"""
+    def _check_task_steps(self, taskbody: etree._Element) -> List[Dict]:
+        """检查Task的steps结构"""
+        steps = taskbody.find('steps')
+        if steps is None:
+            return self._task_steps_errors(None)
+        return self._task_steps_errors([step.find('cmd') is not None for step in steps.findall('step')])
+    
+    def _task_steps_errors(self, step_cmds: Optional[List[bool]]) -> List[Dict]:
+        """
+        根据steps结构生成错误
+        
+        Args:
+            step_cmds: 各<step>是否含<cmd>；None表示<taskbody>缺少<steps>
+        """
         errors = []
-        warnings = []
         
-        # 检查必需元素
-        if tree.find('title') is None:
+        if step_cmds is None:
             errors.append({
                 'type': 'MissingRequiredElement',
-                'message': '<task> 缺少必需的 <title> 元素'
+                'message': '<taskbody> 缺少必需的 <steps> 元素'
             })
+            return errors
         
-        taskbody = tree.find('taskbody')
-        if taskbody is None:
+        if len(step_cmds) == 0:
             errors.append({
-                'type': 'MissingRequiredElement',
-                'message': '<task> 缺少必需的 <taskbody> 元素'
+                'type': 'EmptySteps',
+                'message': '<steps> 必须至少包含一个 <step>'
             })
-        else:
-            # 检查steps
-            steps = taskbody.find('steps')
-            if steps is None:
+        
+        # 检查每个step的cmd
+        for i, has_cmd in enumerate(step_cmds, 1):
+            if not has_cmd:
                 errors.append({
                     'type': 'MissingRequiredElement',
-                    'message': '<taskbody> 缺少必需的 <steps> 元素'
+                    'message': f'第 {i} 个 <step> 缺少必需的 <cmd> 元素'
                 })
-            else:
-                step_list = steps.findall('step')
-                if len(step_list) == 0:
-                    errors.append({
-                        'type': 'EmptySteps',
-                        'message': '<steps> 必须至少包含一个 <step>'
-                    })
-                
-                # 检查每个step的cmd
-                for i, step in enumerate(step_list, 1):
-                    if step.find('cmd') is None:
-                        errors.append({
-                            'type': 'MissingRequiredElement',
-                            'message': f'第 {i} 个 <step> 缺少必需的 <cmd> 元素'
-                        })
         
-        return {'errors': errors, 'warnings': warnings}
+        return errors
     
-    def _check_concept_structure(self, tree: etree._Element) -> Dict:
-        """检查Concept结构"""
-        errors = []
-        warnings = []
+    def _check_streaming(self, data: bytes) -> Tuple[str, Dict, Dict]:
+        """
+        流式解析并检查大文档（结果与_check_content、_check_dita_specifics一致）
         
-        # 检查必需元素
-        if tree.find('title') is None:
-            errors.append({
-                'type': 'MissingRequiredElement',
-                'message': '<concept> 缺少必需的 <title> 元素'
-            })
+        节点完整后（后一个兄弟节点开始或父元素结束时）立即检查并从树中删除，
+        内存中只保留当前打开的元素路径，不再构建整棵树
         
-        if tree.find('conbody') is None:
-            errors.append({
-                'type': 'MissingRequiredElement',
-                'message': '<concept> 缺少必需的 <conbody> 元素'
-            })
+        Args:
+            data: UTF-8编码的XML字节
+            
+        Returns:
+            (根元素tag, 内容检查结果, DITA检查结果)
+        """
+        context = etree.iterparse(
+            io.BytesIO(data),
+            events=('start', 'end', 'comment', 'pi'),
+            remove_blank_text=True,
+            resolve_entities=False,
+            no_network=True
+        )
         
-        return {'errors': errors, 'warnings': warnings}
-    
-    def _check_reference_structure(self, tree: etree._Element) -> Dict:
-        """检查Reference结构"""
-        errors = []
-        warnings = []
+        order = {}              # 待检查节点 → 先序序号（即tree.iter()中的顺序）
+        has_children = set()    # 有过子节点的元素（子节点检查后即删除，len()不再可用）
+        indexed_warnings = []   # (先序序号, 警告)
+        ids = []
+        element_count = 0
+        seq = 0
+        root = None
+        
+        # DITA结构：根元素的直接子元素、第一个<taskbody>及其第一个<steps>、各<step>是否含<cmd>
+        present = set()
+        track_task = False
+        taskbody = steps = None
+        step_cmds = []
+        
+        def flush(parent, stop=None):
+            """检查并删除parent中stop之前的子节点（它们均已完整）"""
+            for child in list(parent):
+                if child is stop:
+                    break
+                has_children.add(parent)
+                index = order.pop(child, None)
+                tag = child.tag
+                if index is not None and \
+                   tag not in _EMPTY_ALLOWED_TAGS and \
+                   (not child.text or not child.text.strip()) and \
+                   child not in has_children and \
+                   (not child.tail or not child.tail.strip()):
+                    indexed_warnings.append((index, self._empty_element_warning(tag)))
+                has_children.discard(child)
+                parent.remove(child)
         
-        # 检查必需元素
-        if tree.find('title') is None:
-            errors.append({
-                'type': 'MissingRequiredElement',
-                'message': '<reference> 缺少必需的 <title> 元素'
-            })
+        try:
+            for event, node in context:
+                if event == 'end':
+                    flush(node)
+                    if node is root:
+                        if root not in has_children and (not root.text or not root.text.strip()) and \
+                           root.tag not in _EMPTY_ALLOWED_TAGS:
+                            indexed_warnings.append((order[root], self._empty_element_warning(root.tag)))
+                    continue
+                
+                # start/comment/pi按文档顺序到达，此前的兄弟节点都已完整
+                parent = node.getparent()
+                if parent is None:
+                    # 根元素之外的注释、处理指令不在树遍历范围内
+                    if event != 'start':
+                        continue
+                    root = node
+                    track_task = 'taskbody' in _DITA_REQUIRED_CHILDREN.get(root.tag, ())
+                else:
+                    flush(parent, node)
+                order[node] = seq
+                seq += 1
+                
+                if event != 'start':
+                    continue
+                element_count += 1
+                
+                elem_id = node.get('id')
+                if elem_id is not None:
+                    ids.append(elem_id)
+                
+                if parent is None:
+                    continue
+                tag = node.tag
+                if parent is root:
+                    present.add(tag)
+                    if track_task and taskbody is None and tag == 'taskbody':
+                        taskbody = node
+                elif parent is taskbody:
+                    if steps is None and tag == 'steps':
+                        steps = node
+                elif parent is steps:
+                    if tag == 'step':
+                        step_cmds.append(False)
+                elif tag == 'cmd' and steps is not None and parent.tag == 'step' and parent.getparent() is steps:
+                    step_cmds[-1] = True
+        except etree.XMLSyntaxError:
+            # iterparse的错误信息与常规解析不同，重新解析以报告一致的错误和行列号
+            etree.fromstring(data, self.parser)
+            raise
+        
+        content_check = {
+            'errors': self._check_ids(ids),
+            'warnings': [warning for _, warning in sorted(indexed_warnings, key=lambda item: item[0])],
+            'element_count': element_count
+        }
         
-        if tree.find('refbody') is None:
-            errors.append({
-                'type': 'MissingRequiredElement',
-                'message': '<reference> 缺少必需的 <refbody> 元素'
-            })
+        errors = []
+        for child_tag in _DITA_REQUIRED_CHILDREN.get(root.tag, ()):
+            if child_tag not in present:
+                errors.append({
+                    'type': 'MissingRequiredElement',
+                    'message': f'<{root.tag}> 缺少必需的 <{child_tag}> 元素'
+                })
+        if taskbody is not None:
+            errors.extend(self._task_steps_errors(step_cmds if steps is not None else None))
         
-        return {'errors': errors, 'warnings': warnings}
+        return root.tag, content_check, {'errors': errors, 'warnings': []}
+    
+    def is_fixable(self, errors: List[Dict]) -> bool:
+        """
+        快速判断错误列表中是否存在try_fix能处理的错误
+        
+        Args:
+            errors: 错误列表
+            
+        Returns:
+            存在可自动修复的错误时返回True
+        """
+        return any(error.get('type') in _FIXABLE_ERROR_TYPES for error in errors)
     
     def try_fix(self, xml_content: str, errors: List[Dict]) -> Optional[str]:
         """
@@ -303,6 +451,7 @@ class XMLValidator:
         
         fixed_xml = xml_content
         fix_count = 0
+        id_fixes = {}  # 非法ID → 修复后的ID
         
         for error in errors:
             error_type = error.get('type')
@@ -318,14 +467,25 @@ class XMLValidator:
             elif error_type == 'InvalidIDFormat':
                 invalid_id = error.get('id')
                 # 生成有效ID
-                valid_id = re.sub(r'[^a-zA-Z0-9_\-\.]', '_', invalid_id)
+                valid_id = _INVALID_ID_CHARS.sub('_', invalid_id)
                 if valid_id and not valid_id[0].isalpha():
                     valid_id = 'id_' + valid_id
                 
-                fixed_xml = fixed_xml.replace(f'id="{invalid_id}"', f'id="{valid_id}"')
+                id_fixes[invalid_id] = valid_id
                 fix_count += 1
                 logger.info(f"✓ 已修复ID: {invalid_id} → {valid_id}")
         
+        # 所有ID修复合并为一次扫描；只匹配id属性，不会误改正文或其他属性中的相同文本
+        if id_fixes:
+            def replace_id(match):
+                valid_id = id_fixes.get(match.group(3))
+                if valid_id is None:
+                    return match.group(0)
+                quote = match.group(2)
+                return f'{match.group(1)}{quote}{valid_id}{quote}'
+            
+            fixed_xml = _ID_ATTR_RE.sub(replace_id, fixed_xml)
+        
         if fix_count > 0:
             logger.info(f"✅ 自动修复了 {fix_count} 个错误")
             return fixed_xml
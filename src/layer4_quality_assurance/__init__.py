@@ -10,12 +10,17 @@ Layer 4: 质量保证层
 - ValidationLoop: 验证-修复循环
 - QualityReporter: 质量报告生成器
 """
-from .qa_manager import QAManager
-from .dita_ot_validator import DITAOTValidator
-from .custom_rules_checker import CustomRulesChecker
-from .intelligent_repairer import IntelligentRepairer
-from .validation_loop import ValidationLoop
-from .quality_reporter import QualityReporter
+from importlib import import_module
+
+# 导出名 → 所在子模块（首次访问时才导入，只用到单个组件时不加载全部依赖）
+_LAZY_EXPORTS = {
+    'QAManager': '.qa_manager',
+    'DITAOTValidator': '.dita_ot_validator',
+    'CustomRulesChecker': '.custom_rules_checker',
+    'IntelligentRepairer': '.intelligent_repairer',
+    'ValidationLoop': '.validation_loop',
+    'QualityReporter': '.quality_reporter'
+}
 
 __all__ = [
     'QAManager',
@@ -26,4 +31,13 @@ __all__ = [
     'QualityReporter'
 ]
 
-__version__ = '1.0.0'
\ No newline at end of file
+__version__ = '1.0.0'
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value  # 缓存，之后直接命中模块属性
+    return value
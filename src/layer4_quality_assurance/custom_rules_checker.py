@@ -3,7 +3,7 @@ Step 2: 自定义规则检查器
 应用项目特定的质量规则
 """
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Union
 import logging
 import json
 from lxml import etree
@@ -97,12 +97,12 @@ class CustomRulesChecker:
         
         logger.info(f"✓ 已初始化 {len(self.rules)} 条基础规则")
     
-    def check(self, dita_xml: str, context: Dict = None) -> Dict[str, Any]:
+    def check(self, dita_xml: Union[str, bytes, etree._Element], context: Dict = None) -> Dict[str, Any]:
         """
         执行自定义规则检查
         
         Args:
-            dita_xml: DITA XML字符串
+            dita_xml: DITA XML字符串、UTF-8字节，或已解析的根元素（直接复用，不再解析）
             context: 上下文信息
             
         Returns:
@@ -122,8 +122,11 @@ class CustomRulesChecker:
         }
         
         try:
-            # 解析XML
-            tree = etree.fromstring(dita_xml.encode('utf-8'))
+            # 解析XML（已解析的树直接复用，字节无需再编码）
+            if isinstance(dita_xml, etree._Element):
+                tree = dita_xml
+            else:
+                tree = etree.fromstring(dita_xml if isinstance(dita_xml, bytes) else dita_xml.encode('utf-8'))
             
             # 执行每条规则
             for rule in self.rules:
@@ -188,6 +191,10 @@ class CustomRulesChecker:
         
         return result
     
+    def check_tree(self, tree: etree._Element, context: Dict = None) -> Dict[str, Any]:
+        """对已解析的DITA树执行自定义规则检查（与其他验证器共用同一次解析）"""
+        return self.check(tree, context)
+    
     def add_rule(self, rule: BaseRule):
         """添加自定义规则"""
         self.rules.append(rule)
@@ -3,7 +3,7 @@ Step 1: DITA-OT标准验证器
 使用DITA Open Toolkit进行官方标准验证
 """
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Union
 import logging
 import subprocess
 import json
@@ -13,6 +13,16 @@ from lxml import etree
 
 logger = logging.getLogger(__name__)
 
+# DITA ID规范：字母开头，只能包含字母、数字、下划线、连字符、点号
+_ID_PATTERN = re.compile(r'^[a-zA-Z][a-zA-Z0-9_\-\.]*$')
+
+# DITA-OT错误输出格式，例如：
+# [ERROR] file.dita:15:8: Element 'step' is missing required child 'cmd'
+_DITA_OT_ERROR_RE = re.compile(r'\[ERROR\]\s+(.+?):(\d+):(\d+):\s+(.+)')
+
+# 允许为空的元素（不产生EmptyElement警告）
+_EMPTY_ALLOWED_TAGS = frozenset({'shortdesc', 'note', 'info', 'stepresult'})
+
 class DITAOTValidator:
     """DITA-OT标准验证器"""
     
@@ -43,12 +53,12 @@ class DITAOTValidator:
         
         logger.info(f"✅ DITA-OT验证器初始化完成 (使用DITA-OT: {self.use_dita_ot})")
     
-    def validate(self, dita_xml: str, content_type: str = None) -> Dict[str, Any]:
+    def validate(self, dita_xml: Union[str, bytes, etree._Element], content_type: str = None) -> Dict[str, Any]:
         """
         验证DITA XML
         
         Args:
-            dita_xml: DITA XML字符串
+            dita_xml: DITA XML字符串、UTF-8字节，或已解析的根元素（内置验证直接复用，不再解析）
             content_type: 内容类型（Task/Concept/Reference）
             
         Returns:
@@ -57,6 +67,11 @@ class DITAOTValidator:
         logger.info("🔍 开始DITA标准验证...")
         
         if self.use_dita_ot:
+            # DITA-OT读取文件，需要文本（已解析的树连同DOCTYPE序列化）
+            if isinstance(dita_xml, etree._Element):
+                dita_xml = etree.tostring(dita_xml.getroottree(), encoding='unicode')
+            elif isinstance(dita_xml, bytes):
+                dita_xml = dita_xml.decode('utf-8')
             return self._validate_with_dita_ot(dita_xml)
         else:
             return self._validate_builtin(dita_xml, content_type)
@@ -130,11 +145,7 @@ class DITAOTValidator:
         """解析DITA-OT输出的错误信息"""
         errors = []
         
-        # DITA-OT错误格式通常为：
-        # [ERROR] file.dita:15:8: Element 'step' is missing required child 'cmd'
-        error_pattern = r'\[ERROR\]\s+(.+?):(\d+):(\d+):\s+(.+)'
-        
-        for match in re.finditer(error_pattern, output):
+        for match in _DITA_OT_ERROR_RE.finditer(output):
             errors.append({
                 'type': 'ValidationError',
                 'file': match.group(1),
@@ -145,7 +156,7 @@ class DITAOTValidator:
         
         return errors
     
-    def _validate_builtin(self, dita_xml: str, content_type: str) -> Dict[str, Any]:
+    def _validate_builtin(self, dita_xml: Union[str, bytes, etree._Element], content_type: str) -> Dict[str, Any]:
         """使用内置规则进行验证（不依赖DITA-OT）"""
         logger.info("🔧 使用内置规则进行验证...")
         
@@ -153,8 +164,11 @@ class DITAOTValidator:
         warnings = []
         
         try:
-            # 解析XML
-            tree = etree.fromstring(dita_xml.encode('utf-8'))
+            # 解析XML（已解析的树直接复用，字节无需再编码）
+            if isinstance(dita_xml, etree._Element):
+                tree = dita_xml
+            else:
+                tree = etree.fromstring(dita_xml if isinstance(dita_xml, bytes) else dita_xml.encode('utf-8'))
             root_tag = tree.tag
             
             # 检测内容类型
@@ -334,48 +348,55 @@ class DITAOTValidator:
         return errors
     
     def _validate_common_rules(self, tree: etree._Element) -> tuple:
-        """验证通用规则"""
-        errors = []
-        warnings = []
+        """
+        验证通用规则
         
-        # 检查ID唯一性
-        id_map = {}
-        for elem in tree.xpath('//*[@id]'):
-            elem_id = elem.get('id')
-            if elem_id in id_map:
-                errors.append({
-                    'type': 'DuplicateID',
-                    'message': f'ID "{elem_id}" 重复使用',
-                    'id': elem_id
-                })
-            else:
-                id_map[elem_id] = elem
+        单次遍历树：同时检查ID唯一性、ID格式和空元素（重复ID错误排在格式错误之前）
+        """
+        duplicate_errors = []
+        format_errors = []
+        warnings = []
         
-        # 检查ID格式（必须以字母开头）
-        id_pattern = re.compile(r'^[a-zA-Z][a-zA-Z0-9_\-\.]*$')
-        for elem in tree.xpath('//*[@id]'):
-            elem_id = elem.get('id')
-            if not id_pattern.match(elem_id):
-                errors.append({
-                    'type': 'InvalidIDFormat',
-                    'message': f'ID "{elem_id}" 格式无效（必须以字母开头，只能包含字母、数字、-_. ）',
-                    'id': elem_id
-                })
+        # 热循环中用到的方法预先绑定为局部变量
+        match_id = _ID_PATTERN.match
+        add_duplicate = duplicate_errors.append
+        add_format = format_errors.append
+        add_warning = warnings.append
+        seen_ids = set()
         
-        # 检查空元素
         for elem in tree.iter():
-            # 跳过允许为空的元素
-            if elem.tag in ['shortdesc', 'note', 'info', 'stepresult']:
-                continue
+            tag = elem.tag
+            
+            elem_id = elem.get('id')
+            if elem_id is not None:
+                # 检查ID唯一性
+                if elem_id in seen_ids:
+                    add_duplicate({
+                        'type': 'DuplicateID',
+                        'message': f'ID "{elem_id}" 重复使用',
+                        'id': elem_id
+                    })
+                else:
+                    seen_ids.add(elem_id)
+                
+                # 检查ID格式（必须以字母开头）
+                if not match_id(elem_id):
+                    add_format({
+                        'type': 'InvalidIDFormat',
+                        'message': f'ID "{elem_id}" 格式无效（必须以字母开头，只能包含字母、数字、-_. ）',
+                        'id': elem_id
+                    })
             
-            # 检查是否完全为空
-            if not elem.text and len(elem) == 0:
-                warnings.append({
+            # 检查是否完全为空（跳过允许为空的元素）
+            if tag not in _EMPTY_ALLOWED_TAGS and not elem.text and len(elem) == 0:
+                add_warning({
                     'type': 'EmptyElement',
-                    'message': f'元素 <{elem.tag}> 为空',
-                    'element': elem.tag
+                    'message': f'元素 <{tag}> 为空',
+                    'element': tag
                 })
         
+        errors = duplicate_errors + format_errors
+        
         # 检查DOCTYPE声明
         # 注意：lxml解析后会丢失DOCTYPE，这里只是示例
         
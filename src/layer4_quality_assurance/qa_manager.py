@@ -3,9 +3,10 @@ Layer 4 主质量保证管理器
 协调所有QA步骤，确保DITA文档完全符合标准
 """
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Union
 import logging
 from datetime import datetime
+from lxml import etree
 
 from .dita_ot_validator import DITAOTValidator
 from .custom_rules_checker import CustomRulesChecker
@@ -106,9 +107,12 @@ class QAManager:
             else:
                 logger.warning("  ⚠️  DITA标准验证未完全通过")
             
+            # Step 2、3共用同一次解析
+            final_doc = self._parse_final_xml(result['final_dita_xml'])
+            
             # Step 2: 自定义规则检查
             logger.info("\n[Step 2/5] 自定义规则检查...")
-            custom_checks_result = self._step2_custom_checks(result['final_dita_xml'])
+            custom_checks_result = self._step2_custom_checks(final_doc)
             
             result['step_results']['custom_checks'] = custom_checks_result
             
@@ -117,7 +121,7 @@ class QAManager:
             # Step 3: 最终验证（确认）
             logger.info("\n[Step 3/5] 最终验证...")
             final_validation = self._step3_final_validation(
-                result['final_dita_xml'],
+                result['final_dita_xml'] if self.dita_ot_validator.use_dita_ot else final_doc,
                 content_type
             )
             
@@ -183,13 +187,26 @@ class QAManager:
         """Step 1: DITA标准验证 + 修复循环"""
         return self.validation_loop.run(dita_xml, content_type)
     
-    def _step2_custom_checks(self, dita_xml: str) -> Dict:
-        """Step 2: 自定义规则检查"""
+    def _parse_final_xml(self, dita_xml: str) -> Union[str, etree._Element]:
+        """
+        解析最终XML，供自定义规则检查和最终验证共用
+        
+        解析失败时返回原字符串，由各检查器分别报告错误
+        """
+        try:
+            return etree.fromstring(dita_xml.encode('utf-8'))
+        except (etree.XMLSyntaxError, ValueError):
+            return dita_xml
+    
+    def _step2_custom_checks(self, dita_xml: Union[str, etree._Element]) -> Dict:
+        """Step 2: 自定义规则检查（已解析的树交给check_tree复用，解析失败的字符串由check报告错误）"""
+        if isinstance(dita_xml, etree._Element):
+            return self.custom_rules_checker.check_tree(dita_xml)
         return self.custom_rules_checker.check(dita_xml)
     
     def _step3_final_validation(
         self,
-        dita_xml: str,
+        dita_xml: Union[str, etree._Element],
         content_type: str
     ) -> Dict:
         """Step 3: 最终验证"""
@@ -3,6 +3,14 @@
 """
 from .config import Config
 from .logger import setup_logger
-from .ai_service import AIService
 
-__all__ = ['Config', 'setup_logger', 'AIService']
\ No newline at end of file
+__all__ = ['Config', 'setup_logger', 'AIService']
+
+
+def __getattr__(name):
+    # AIService依赖openai（导入耗时数百毫秒），首次访问时才导入，
+    # 使 from src.utils import json_utils 等轻量导入不受影响
+    if name == 'AIService':
+        from .ai_service import AIService
+        return AIService
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
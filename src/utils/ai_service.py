@@ -3,7 +3,8 @@ AI服务 - 统一的LLM调用接口
 整合千问API和Claude，提供文档分析专用方法
 """
 from openai import OpenAI
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
 import json
 from .logger import setup_logger
 from .config import Config
@@ -70,6 +71,46 @@ class AIService:
         
         return self.chat(messages, temperature, max_tokens, json_mode)
     
+    def generate_batch(
+        self,
+        prompts: List[str],
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 4000,
+        json_mode: bool = False,
+        max_workers: int = 8,
+        return_exceptions: bool = False
+    ) -> List[Union[str, Exception]]:
+        """
+        批量生成文本（并发请求，结果顺序与prompts一致）
+        
+        Args:
+            prompts: 用户提示词列表
+            system_prompt: 系统提示词
+            temperature: 温度
+            max_tokens: 最大token数
+            json_mode: 是否返回JSON
+            max_workers: 最大并发请求数
+            return_exceptions: 为True时失败的请求返回异常对象而不是抛出
+        
+        Returns:
+            生成的文本列表
+        """
+        if not prompts:
+            return []
+        
+        def _generate(prompt: str) -> Union[str, Exception]:
+            try:
+                return self.generate(prompt, system_prompt, temperature, max_tokens, json_mode)
+            except Exception as e:
+                if return_exceptions:
+                    return e
+                raise
+        
+        workers = max(1, min(max_workers, len(prompts)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(_generate, prompts))
+    
     def chat(
         self,
         messages: List[Dict[str, str]],
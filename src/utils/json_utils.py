@@ -0,0 +1,104 @@
+"""
+JSON工具模块
+优先使用orjson（更快、直接输出UTF-8字节），未安装时回退到标准库json
+
+两种实现的输出保持一致：紧凑输出不带空格（separators=(',', ':')），
+datetime/date/time序列化为ISO 8601字符串。
+已知差异（回退实现不做处理）：
+- NaN/Infinity：orjson写为null，标准库写为NaN/Infinity（非标准JSON）；
+  解析时orjson拒绝NaN/Infinity字面量，标准库接受
+- dataclass、UUID、numpy数组等：orjson原生支持，标准库需通过default转换
+"""
+import datetime
+import json
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # orjson为可选依赖
+    orjson = None
+
+# 标准库回退时与orjson一致的分隔符（紧凑输出 / 2空格缩进输出）
+_COMPACT_SEPARATORS = (',', ':')
+_INDENT_SEPARATORS = (',', ': ')
+
+_DATETIME_TYPES = (datetime.datetime, datetime.date, datetime.time)
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """
+    解析JSON
+
+    Args:
+        data: JSON字符串或UTF-8字节
+
+    Returns:
+        解析后的Python对象
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_bytes(obj: Any, indent: bool = False, default: Optional[Callable] = None) -> bytes:
+    """
+    序列化为UTF-8编码的JSON字节（非ASCII字符不转义）
+
+    Args:
+        obj: 待序列化对象
+        indent: 是否使用2空格缩进
+        default: 无法序列化对象的转换函数
+
+    Returns:
+        JSON字节
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=default, option=option)
+
+    return json.dumps(
+        obj,
+        indent=2 if indent else None,
+        separators=_INDENT_SEPARATORS if indent else _COMPACT_SEPARATORS,
+        ensure_ascii=False,
+        default=_stdlib_default(default)
+    ).encode('utf-8')
+
+
+def _stdlib_default(default: Optional[Callable]) -> Callable:
+    """标准库回退的default：与orjson一样先将datetime/date/time转为ISO 8601，其余交给调用方的default"""
+    def convert(obj: Any) -> Any:
+        if isinstance(obj, _DATETIME_TYPES):
+            return obj.isoformat()
+        if default is not None:
+            return default(obj)
+        raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+    return convert
+
+
+def dumps(obj: Any, indent: bool = False, default: Optional[Callable] = None) -> str:
+    """序列化为JSON字符串（非ASCII字符不转义）"""
+    return dumps_bytes(obj, indent=indent, default=default).decode('utf-8')
+
+
+def dump(obj: Any, path: Union[str, Path], indent: bool = True, default: Optional[Callable] = None):
+    """
+    序列化并写入JSON文件（UTF-8）
+
+    Args:
+        obj: 待序列化对象
+        path: 输出路径
+        indent: 是否使用2空格缩进
+        default: 无法序列化对象的转换函数
+    """
+    with open(path, 'wb') as f:
+        f.write(dumps_bytes(obj, indent=indent, default=default))
+
+
+def load(path: Union[str, Path]) -> Any:
+    """读取并解析JSON文件"""
+    with open(path, 'rb') as f:
+        return loads(f.read())
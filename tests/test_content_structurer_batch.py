@@ -0,0 +1,123 @@
+"""
+ContentStructurer 批量结构化测试
+覆盖预取响应、响应缓存命中和单项请求失败降级三条路径
+"""
+import sys
+import json
+from pathlib import Path
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.layer3_dita_conversion.content_structurer import (
+    ContentStructurer, clear_response_cache, _RESPONSE_CACHE
+)
+
+TASK_CONTENT = """
+1. Download the installer
+2. Run the installer
+"""
+
+LLM_TASK_RESPONSE = json.dumps({
+    'steps': [{'cmd': 'LLM step', 'info': None}],
+    'prerequisites': None
+})
+
+
+class FakeAIService:
+    """记录请求的假AI服务：标题含 FAIL 的提示词返回异常"""
+
+    provider = 'fake'
+    model = 'fake-model'
+
+    def __init__(self):
+        self.batch_prompts = []
+        self.generate_calls = 0
+
+    def generate(self, prompt):
+        self.generate_calls += 1
+        return LLM_TASK_RESPONSE
+
+    def generate_batch(self, prompts, return_exceptions=False):
+        self.batch_prompts.append(list(prompts))
+        return [
+            RuntimeError('LLM unavailable') if 'FAIL' in prompt else LLM_TASK_RESPONSE
+            for prompt in prompts
+        ]
+
+
+def _make_structurer():
+    """创建使用假AI服务的结构化器（不初始化真实AIService）"""
+    clear_response_cache()
+    structurer = ContentStructurer(use_ai=False)
+    structurer.use_ai = True
+    structurer.ai_service = FakeAIService()
+    return structurer
+
+
+def test_batch_uses_prefetched_responses():
+    """测试预取响应直接使用，不再逐项请求，并写入缓存"""
+    print("\n" + "="*70)
+    print("测试 1: 预取响应")
+    print("="*70)
+
+    structurer = _make_structurer()
+    items = [
+        (TASK_CONTENT, 'Install A', 'Task', {}),
+        (TASK_CONTENT, 'Install B', 'Task', {}),
+    ]
+
+    results = structurer.structure_content_batch(items)
+
+    assert len(structurer.ai_service.batch_prompts) == 1, "应只发起一次批量请求"
+    assert len(structurer.ai_service.batch_prompts[0]) == 2, "批量请求应包含全部2个提示词"
+    assert structurer.ai_service.generate_calls == 0, "预取后不应再逐项请求"
+    assert [r['steps'][0]['cmd'] for r in results] == ['LLM step', 'LLM step'], "应使用LLM结果"
+    assert len(_RESPONSE_CACHE) == 2, "有效响应应写入缓存"
+
+    print("✅ 预取响应测试通过")
+
+
+def test_batch_skips_cached_responses():
+    """测试已缓存的响应不再请求"""
+    print("\n" + "="*70)
+    print("测试 2: 响应缓存命中")
+    print("="*70)
+
+    structurer = _make_structurer()
+    items = [(TASK_CONTENT, 'Install A', 'Task', {})]
+
+    first = structurer.structure_content_batch(items)
+    structurer.reset()
+    second = structurer.structure_content_batch(items)
+
+    assert structurer.ai_service.batch_prompts[1] == [], "缓存命中的项不应再请求"
+    assert structurer.ai_service.generate_calls == 0, "缓存命中后不应逐项请求"
+    assert first == second, "缓存命中结果应与首次结果一致"
+
+    print("✅ 响应缓存测试通过")
+
+
+def test_batch_failed_item_falls_back_to_rules():
+    """测试单项请求失败时降级到规则提取，且不写入缓存"""
+    print("\n" + "="*70)
+    print("测试 3: 请求失败降级")
+    print("="*70)
+
+    structurer = _make_structurer()
+    items = [
+        (TASK_CONTENT, 'Install OK', 'Task', {}),
+        (TASK_CONTENT, 'Install FAIL', 'Task', {}),
+    ]
+
+    ok, failed = structurer.structure_content_batch(items)
+
+    assert ok['steps'][0]['cmd'] == 'LLM step', "成功项应使用LLM结果"
+    assert [s['cmd'] for s in failed['steps']] == [
+        'Download the installer', 'Run the installer'
+    ], "失败项应降级到规则提取"
+    assert structurer.ai_service.generate_calls == 0, "失败项不应重新逐项请求"
+    assert len(_RESPONSE_CACHE) == 1, "失败的请求不应写入缓存"
+
+    print("✅ 请求失败降级测试通过")
@@ -0,0 +1,35 @@
+"""
+errors 模块测试
+验证使用__slots__的异常类在pickle/copy后保留全部字段
+"""
+import sys
+import copy
+import pickle
+from pathlib import Path
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.layer3_dita_conversion.errors import ConstraintError
+
+
+def test_error_pickle_and_copy_round_trip():
+    """测试ConstraintError经pickle、copy、deepcopy后字段完整"""
+    print("\n" + "="*70)
+    print("测试: 异常pickle/copy往返")
+    print("="*70)
+    
+    error = ConstraintError('约束冲突', 'CUSTOM_CODE', details={'a': 1}, is_warning=True)
+    
+    for restored in (
+        pickle.loads(pickle.dumps(error)),
+        copy.copy(error),
+        copy.deepcopy(error),
+    ):
+        assert type(restored) is ConstraintError, "类型应保持不变"
+        assert restored.to_dict() == error.to_dict(), "全部字段应保留"
+        assert restored.args == error.args, "args应保留"
+        assert str(restored) == str(error), "字符串表示应一致"
+    
+    print("✅ 异常pickle/copy往返测试通过")
@@ -0,0 +1,104 @@
+"""
+json_utils 测试
+orjson和标准库回退两种实现分别测试loads/dumps/dump/load，并验证两者输出一致
+"""
+import sys
+import datetime
+from pathlib import Path
+
+import pytest
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.utils import json_utils
+
+BACKENDS = ['orjson', 'stdlib']
+
+SAMPLE = {
+    'title': '安装指南',
+    'steps': [{'cmd': 'Run', 'info': None}, {'cmd': '验证', 'info': 'ok'}],
+    'confidence': 0.85,
+    'count': 3,
+    'flags': [True, False],
+    'empty': {},
+    1: 'int key',
+}
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request, monkeypatch):
+    """切换json_utils使用的实现（未安装orjson时跳过orjson用例）"""
+    if request.param == 'orjson':
+        if json_utils.orjson is None:
+            pytest.skip("orjson未安装")
+    else:
+        monkeypatch.setattr(json_utils, 'orjson', None)
+    return request.param
+
+
+def test_dumps_compact_and_indent(backend):
+    """测试紧凑/缩进输出格式（与orjson一致）"""
+    assert json_utils.dumps({'a': [1, 2], 'b': '中'}) == '{"a":[1,2],"b":"中"}', "紧凑输出不应带空格"
+    assert json_utils.dumps({'a': [1, {}]}, indent=True) == '{\n  "a": [\n    1,\n    {}\n  ]\n}', "缩进输出应为2空格"
+    assert json_utils.dumps_bytes({'t': '中文'}) == '{"t":"中文"}'.encode('utf-8'), "非ASCII字符不应转义"
+
+
+def test_dumps_round_trip(backend):
+    """测试序列化后解析还原（非字符串键转为字符串）"""
+    expected = {str(k): v for k, v in SAMPLE.items()}
+    assert json_utils.loads(json_utils.dumps(SAMPLE)) == expected
+    assert json_utils.loads(json_utils.dumps_bytes(SAMPLE, indent=True)) == expected
+
+
+def test_dumps_datetime(backend):
+    """测试datetime/date/time序列化为ISO 8601字符串"""
+    obj = {
+        'dt': datetime.datetime(2024, 1, 2, 3, 4, 5, 123),
+        'tz': datetime.datetime(2024, 1, 2, tzinfo=datetime.timezone.utc),
+        'd': datetime.date(2024, 1, 2),
+        't': datetime.time(3, 4, 5),
+    }
+    assert json_utils.dumps(obj) == (
+        '{"dt":"2024-01-02T03:04:05.000123","tz":"2024-01-02T00:00:00+00:00",'
+        '"d":"2024-01-02","t":"03:04:05"}'
+    )
+
+
+def test_dumps_default(backend):
+    """测试default转换函数，以及无法序列化时抛出TypeError"""
+    assert json_utils.dumps({'p': Path('a/b')}, default=str) == '{"p":"a/b"}'
+    with pytest.raises(TypeError):
+        json_utils.dumps({'p': Path('a/b')})
+
+
+def test_loads_str_and_bytes(backend):
+    """测试解析字符串和UTF-8字节"""
+    assert json_utils.loads('{"a": [1, "中"]}') == {'a': [1, '中']}
+    assert json_utils.loads('{"a": [1, "中"]}'.encode('utf-8')) == {'a': [1, '中']}
+    with pytest.raises(ValueError):
+        json_utils.loads('{"a": ')
+
+
+def test_dump_and_load_file(backend, tmp_path):
+    """测试写入和读取JSON文件（默认缩进）"""
+    path = tmp_path / 'out.json'
+    json_utils.dump({'title': '中文', 'n': 1}, path)
+
+    assert path.read_bytes() == '{\n  "title": "中文",\n  "n": 1\n}'.encode('utf-8')
+    assert json_utils.load(path) == {'title': '中文', 'n': 1}
+    assert json_utils.load(str(path)) == {'title': '中文', 'n': 1}
+
+
+def test_backends_produce_identical_output(monkeypatch):
+    """测试两种实现对同一对象输出完全相同的字节"""
+    if json_utils.orjson is None:
+        pytest.skip("orjson未安装")
+
+    obj = dict(SAMPLE, when=datetime.datetime(2024, 1, 2, 3, 4, 5))
+    fast = [json_utils.dumps_bytes(obj), json_utils.dumps_bytes(obj, indent=True)]
+    monkeypatch.setattr(json_utils, 'orjson', None)
+    fallback = [json_utils.dumps_bytes(obj), json_utils.dumps_bytes(obj, indent=True)]
+
+    assert fast == fallback, "orjson与标准库回退的输出应一致"
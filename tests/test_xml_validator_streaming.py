@@ -0,0 +1,70 @@
+"""
+XMLValidator 流式检查测试
+同一批文档分别走整树解析和iterparse流式检查，验证结果必须完全一致
+"""
+import sys
+from pathlib import Path
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.layer3_dita_conversion import xml_validator
+from src.layer3_dita_conversion.xml_validator import XMLValidator
+
+DOCUMENTS = {
+    'valid_task': (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<task id="install"><title>Install</title><taskbody><steps>'
+        '<step><cmd>Download</cmd></step><step><cmd>Run</cmd><info/></step>'
+        '</steps></taskbody></task>'
+    ),
+    'no_declaration': '<concept id="c1"><title>概念</title><conbody><p>中文内容</p></conbody></concept>',
+    'duplicate_and_invalid_ids': (
+        '<reference id="r"><title>Ref</title><refbody>'
+        '<section id="dup"><p id="dup">x</p></section><section id="1bad"/>'
+        '</refbody></reference>'
+    ),
+    'missing_title_and_empty': '<task id="t"><taskbody><steps><step><cmd></cmd></step></steps></taskbody></task>',
+    'comments_and_entities': (
+        '<!DOCTYPE concept [<!ENTITY ent "E">]>\n'
+        '<concept id="c"><!-- c --><title>T &ent;</title><?pi x?><conbody/></concept>'
+    ),
+    'unknown_root': '<p>plain</p>',
+    'malformed_unclosed': '<task id="t"><title>Broken</title><taskbody></task>',
+    'malformed_garbage': 'not xml at all',
+    'malformed_empty': '',
+}
+
+
+def _validate_all(threshold):
+    """以指定流式阈值验证全部文档（str和bytes两种输入）"""
+    original = xml_validator._STREAMING_THRESHOLD
+    xml_validator._STREAMING_THRESHOLD = threshold
+    try:
+        validator = XMLValidator()
+        return {
+            name: (validator.validate(doc), validator.validate(doc.encode('utf-8')))
+            for name, doc in DOCUMENTS.items()
+        }
+    finally:
+        xml_validator._STREAMING_THRESHOLD = original
+
+
+def test_streaming_matches_tree_validation():
+    """测试流式检查与整树解析的验证结果一致（包括格式错误的输入）"""
+    print("\n" + "="*70)
+    print("测试: 流式检查 vs 整树解析")
+    print("="*70)
+
+    streamed = _validate_all(-1)
+    parsed = _validate_all(10 ** 9)
+
+    for name in DOCUMENTS:
+        assert streamed[name] == parsed[name], f"{name}: 流式检查结果与整树解析不一致"
+        print(f"  ✓ {name}")
+
+    assert not parsed['malformed_unclosed'][0]['is_wellformed'], "未闭合文档应判为格式错误"
+    assert parsed['valid_task'][0]['is_wellformed'], "合法文档应判为格式良好"
+
+    print("✅ 流式检查测试通过")